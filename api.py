@@ -0,0 +1,126 @@
+__import__('pysqlite3')
+import sys
+sys.modules['sqlite3'] = sys.modules.pop('pysqlite3')
+import os
+import tempfile
+from typing import Dict, List, Literal, Optional
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import FileResponse, PlainTextResponse
+from pydantic import BaseModel, Field
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
+
+from briefing.exportacao import ExportadorBriefings
+from briefing.metricas import METRICAS, TIPO_CONTEUDO_PROMETHEUS
+from briefing.motor import MotorBriefing
+
+# API HTTP do gerador de briefings, para integração com outros sistemas (ex.: CRM).
+# Execução: uvicorn api:app --workers 4
+# Cada worker é um processo com seu próprio motor e limitador de taxa (divida
+# BRIEFING_LIMITE_RPM/TPM entre os workers); o cache em SQLite é compartilhado.
+
+app = FastAPI(title="Gerador de Briefing para Sites")
+motor = MotorBriefing.do_ambiente()
+exportador = ExportadorBriefings.do_ambiente()
+
+MAX_SIMULTANEAS_LOTE = int(os.getenv("BRIEFING_MAX_SIMULTANEAS", "4"))
+MAX_ITENS_LOTE = int(os.getenv("BRIEFING_MAX_ITENS_LOTE", "500"))
+
+
+class RequisicaoBriefing(BaseModel):
+    respostas: Dict[str, str] = Field(..., description="Respostas do formulário, com as chaves internas (ex.: nome_empresa)")
+    usar_cache: bool = True
+    por_secoes: bool = False
+
+
+class RequisicaoLote(BaseModel):
+    respostas: List[Dict[str, str]] = Field(..., max_length=MAX_ITENS_LOTE)
+    usar_cache: bool = True
+    por_secoes: bool = False
+    max_simultaneas: Optional[int] = Field(None, ge=1, le=32)
+
+
+class BriefingExportado(BaseModel):
+    nome: str = Field("", description="Usado no nome dos arquivos (ex.: nome da empresa)")
+    briefing: str
+
+
+class RequisicaoExportacao(BaseModel):
+    briefings: List[BriefingExportado] = Field(..., min_length=1, max_length=MAX_ITENS_LOTE)
+    formatos: List[Literal["md", "docx", "pdf"]] = Field(["md"], min_length=1)
+
+
+class ResultadoBriefing(BaseModel):
+    briefing: Optional[str]
+    do_cache: bool
+    tokens_prompt_estimados: int = 0
+    tokens_entrada: int = 0
+    tokens_saida: int = 0
+    erro: Optional[str] = None
+
+
+@app.get("/saude")
+async def saude():
+    return {"status": "ok", "modelo": motor.modelo}
+
+
+# Métricas do worker no formato do Prometheus: duração por etapa do pipeline,
+# erros por classe, tokens e custo estimado. Com vários workers, cada raspagem
+# atinge um deles; para totais exatos, rode a API com um worker por porta.
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metricas():
+    return PlainTextResponse(METRICAS.texto_prometheus(), media_type=TIPO_CONTEUDO_PROMETHEUS)
+
+
+@app.post("/briefings", response_model=ResultadoBriefing)
+async def gerar_briefing(requisicao: RequisicaoBriefing):
+    try:
+        return await run_in_threadpool(motor.gerar, requisicao.respostas, requisicao.usar_cache, requisicao.por_secoes)
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Erro ao gerar o briefing: {str(e)}")
+
+
+@app.post("/briefings/lote", response_model=List[ResultadoBriefing])
+async def gerar_briefings_em_lote(requisicao: RequisicaoLote):
+    return await run_in_threadpool(
+        motor.gerar_em_lote,
+        requisicao.respostas,
+        requisicao.max_simultaneas or MAX_SIMULTANEAS_LOTE,
+        usar_cache=requisicao.usar_cache,
+        por_secoes=requisicao.por_secoes,
+    )
+
+
+# ZIP com os briefings nos formatos pedidos, montado em um arquivo temporário
+# (removido depois do envio) e transmitido em partes
+@app.post("/briefings/exportar", response_class=FileResponse)
+async def exportar_briefings(requisicao: RequisicaoExportacao):
+    with tempfile.NamedTemporaryFile(suffix=".zip", delete=False) as destino:
+        pass
+    try:
+        with METRICAS.medir("exportacao"):
+            await run_in_threadpool(
+                exportador.exportar_zip,
+                [(item.nome, item.briefing) for item in requisicao.briefings],
+                list(dict.fromkeys(requisicao.formatos)),
+                destino.name,
+            )
+    except Exception as e:
+        os.remove(destino.name)
+        raise HTTPException(status_code=500, detail=f"Erro ao exportar os briefings: {str(e)}")
+    return FileResponse(
+        destino.name, media_type="application/zip", filename="briefings.zip",
+        background=BackgroundTask(os.remove, destino.name),
+    )
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(
+        "api:app",
+        host=os.getenv("BRIEFING_API_HOST", "0.0.0.0"),
+        port=int(os.getenv("BRIEFING_API_PORTA", "8000")),
+        workers=int(os.getenv("BRIEFING_API_WORKERS", "4")),
+    )
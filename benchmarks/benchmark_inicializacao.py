@@ -0,0 +1,101 @@
+# Benchmark de inicialização da aplicação.
+#
+# Mede, sempre em um interpretador novo (partida a frio):
+#   - o tempo de importação dos módulos pesados usados pelo app;
+#   - o tempo até a primeira renderização de main.py (primeira execução no
+#     AppTest do Streamlit) e o tempo de um rerun;
+#   - quais módulos pesados foram carregados na primeira renderização.
+#
+# Uso: python benchmarks/benchmark_inicializacao.py [--repeticoes 5]
+#      [--limite-primeira-pintura 3.0]
+# Sai com código 1 se a primeira renderização passar do limite ou se algum
+# módulo que deveria ser carregado sob demanda for importado na partida.
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULOS = ["streamlit", "pandas", "google.generativeai"]
+
+# Módulos que só devem ser importados quando forem de fato necessários
+MODULOS_SOB_DEMANDA = ["pandas", "google.generativeai"]
+
+CODIGO_IMPORTACAO = """
+import json, sys, time
+inicio = time.perf_counter()
+__import__(sys.argv[1])
+print(json.dumps({"segundos": time.perf_counter() - inicio}))
+"""
+
+CODIGO_PRIMEIRA_PINTURA = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+
+app = AppTest.from_file("main.py", default_timeout=60)
+inicio = time.perf_counter()
+app.run()
+primeira_pintura = time.perf_counter() - inicio
+carregados = [modulo for modulo in json.loads(sys.argv[1]) if modulo in sys.modules]
+inicio = time.perf_counter()
+app.run()
+rerun = time.perf_counter() - inicio
+print(json.dumps({
+    "primeira_pintura": primeira_pintura,
+    "rerun": rerun,
+    "erros": [str(erro.value) for erro in app.exception],
+    "carregados": carregados,
+}))
+"""
+
+
+def executar(codigo, *argumentos):
+    processo = subprocess.run(
+        [sys.executable, "-c", codigo, *argumentos],
+        cwd=RAIZ,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(processo.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de inicialização do gerador de briefings")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--limite-primeira-pintura", type=float, default=None,
+                        help="Tempo máximo aceitável (s) para a primeira renderização")
+    args = parser.parse_args()
+
+    print("Tempo de importação (mediana, partida a frio)")
+    for modulo in MODULOS:
+        tempos = [executar(CODIGO_IMPORTACAO, modulo)["segundos"] for _ in range(args.repeticoes)]
+        print(f"  {modulo:<25} {statistics.median(tempos) * 1000:8.1f} ms")
+
+    medicoes = [executar(CODIGO_PRIMEIRA_PINTURA, json.dumps(MODULOS_SOB_DEMANDA)) for _ in range(args.repeticoes)]
+    primeira_pintura = statistics.median(m["primeira_pintura"] for m in medicoes)
+    rerun = statistics.median(m["rerun"] for m in medicoes)
+    print("main.py (mediana)")
+    print(f"  {'primeira renderização':<25} {primeira_pintura * 1000:8.1f} ms")
+    print(f"  {'rerun':<25} {rerun * 1000:8.1f} ms")
+
+    falhou = False
+    erros = medicoes[0]["erros"]
+    if erros:
+        print(f"ERRO: o script gerou exceções: {erros}")
+        falhou = True
+    carregados = medicoes[0]["carregados"]
+    if carregados:
+        print(f"REGRESSÃO: módulos carregados na primeira renderização: {', '.join(carregados)}")
+        falhou = True
+    if args.limite_primeira_pintura is not None and primeira_pintura > args.limite_primeira_pintura:
+        print(f"REGRESSÃO: primeira renderização acima de {args.limite_primeira_pintura:.1f} s")
+        falhou = True
+    sys.exit(1 if falhou else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+# Benchmark de ponta a ponta do pipeline de geração, sem rede.
+#
+# O modelo é substituído pelo BackendLocal (briefing.backends), que simula a
+# latência e o tamanho da saída de forma determinística; assim o que se mede é
+# o custo do próprio pipeline: leitura do CSV, mapeamento das colunas, montagem
+# do prompt, geração (cache, limitador, threads) e preparo do download.
+#
+# Cenários:
+#   - unico: um CSV de uma linha, do upload até os bytes do download;
+#   - lote:  um CSV com --linhas-lote linhas gerado em paralelo (--simultaneas);
+#   - csv:   leitura e mapeamento de um CSV grande (--linhas-csv linhas, com
+#            colunas extras que devem ser descartadas), sem geração.
+#
+# Para cada cenário são reportados vazão, latência p50/p95 e pico de memória
+# (tracemalloc, medido em uma execução à parte para não distorcer os tempos,
+# e o RSS máximo do processo até ali).
+#
+# Uso: python benchmarks/benchmark_pipeline.py [--latencia 0.5] [--simultaneas 8]
+#      [--json resultado.json] [--comparar base.json]
+import argparse
+import io
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from briefing.backends import BackendLocal  # noqa: E402
+from briefing.cache import CacheBriefing  # noqa: E402
+from briefing.leitura_csv import TAMANHO_BLOCO, iterar_respostas, preparar_leitura  # noqa: E402
+from briefing.limite import LimitadorTaxa  # noqa: E402
+from briefing.mapeamento import ESQUEMA_CSV, SIM_NAO  # noqa: E402
+from briefing.motor import MotorBriefing  # noqa: E402
+from estatisticas import percentil  # noqa: E402
+
+CENARIOS = ("unico", "lote", "csv")
+
+_PALAVRAS = (
+    "empresa", "serviços", "clientes", "site", "institucional", "conteúdo", "contato", "agendamento",
+    "blog", "produtos", "moderno", "confiável", "rápido", "acessível", "marca", "resultados",
+)
+
+
+# Fração das respostas em texto livre que ocupam duas linhas
+FRACAO_MULTILINHA = 0.05
+
+
+# Texto aleatório; uma fração das respostas tem uma quebra de linha no meio,
+# como nas respostas reais do formulário
+def _texto(aleatorio, palavras):
+    texto = [aleatorio.choice(_PALAVRAS) for _ in range(palavras)]
+    if palavras > 1 and aleatorio.random() < FRACAO_MULTILINHA:
+        meio = palavras // 2
+        return " ".join(texto[:meio]) + "\n" + " ".join(texto[meio:])
+    return " ".join(texto)
+
+
+# CSV no formato exportado pelo formulário, com respostas aleatórias (mas
+# reprodutíveis, algumas em várias linhas) e `colunas_extras` colunas que não
+# correspondem a perguntas
+def gerar_csv(linhas, colunas_extras=0, palavras_por_resposta=40, semente=0):
+    import pandas as pd
+
+    aleatorio = random.Random(semente)
+    perguntas = [(pergunta, tipo) for _, perguntas_campo, tipo in ESQUEMA_CSV for pergunta in perguntas_campo]
+    dados = {}
+    for pergunta, tipo in perguntas:
+        if tipo == SIM_NAO:
+            dados[pergunta] = [aleatorio.choice(("Sim", "Não")) for _ in range(linhas)]
+        else:
+            dados[pergunta] = [_texto(aleatorio, palavras_por_resposta) for _ in range(linhas)]
+    for indice in range(colunas_extras):
+        dados[f"Observação interna {indice + 1}"] = [_texto(aleatorio, palavras_por_resposta) for _ in range(linhas)]
+    return pd.DataFrame(dados).to_csv(index=False).encode("utf-8")
+
+
+def criar_motor(args, diretorio):
+    backend = BackendLocal(
+        latencia=args.latencia,
+        latencia_primeiro_trecho=args.latencia_primeiro_trecho,
+        tokens_saida=args.tokens_saida,
+    )
+    cache = CacheBriefing(os.path.join(diretorio, "cache.db"), ttl_segundos=3600, max_entradas=100_000,
+                          max_bytes=1024 ** 3)
+    # Limites altos: o benchmark mede o pipeline, não a cota da API
+    limitador = LimitadorTaxa(requisicoes_por_minuto=1e9, tokens_por_minuto=1e12,
+                              max_simultaneas=max(args.simultaneas, 8))
+    return MotorBriefing(cache, limitador, backend, max_simultaneas_secoes=args.simultaneas)
+
+
+def cenario_unico(motor, args, csv_bytes):
+    arquivo = io.BytesIO(csv_bytes)
+    mapeamento = preparar_leitura(arquivo)
+    respostas = next(iterar_respostas(arquivo, mapeamento, args.motor_csv))
+    resultado = motor.gerar(respostas, usar_cache=False, por_secoes=args.por_secoes)
+    resultado["briefing"].encode("utf-8")
+    return [], 1
+
+
+def cenario_lote(motor, args, csv_bytes):
+    arquivo = io.BytesIO(csv_bytes)
+    mapeamento = preparar_leitura(arquivo)
+    lista_respostas = list(iterar_respostas(arquivo, mapeamento, args.motor_csv))
+
+    # Latência de cada item medida dentro da thread que o gera
+    latencias = []
+    gerar = motor.gerar
+
+    def gerar_medindo(*argumentos, **opcoes):
+        inicio = time.perf_counter()
+        try:
+            return gerar(*argumentos, **opcoes)
+        finally:
+            latencias.append(time.perf_counter() - inicio)
+
+    motor.gerar = gerar_medindo
+    try:
+        resultados = motor.gerar_em_lote(lista_respostas, args.simultaneas, usar_cache=False,
+                                         por_secoes=args.por_secoes)
+    finally:
+        del motor.gerar
+    erros = [r["erro"] for r in resultados if r["erro"]]
+    if erros:
+        raise RuntimeError(f"{len(erros)} itens falharam no lote: {erros[0]}")
+    for resultado in resultados:
+        resultado["briefing"].encode("utf-8")
+    return latencias, len(resultados)
+
+
+def cenario_csv(motor, args, csv_bytes):
+    arquivo = io.BytesIO(csv_bytes)
+    mapeamento = preparar_leitura(arquivo)
+    # Latência de cada bloco lido e mapeado
+    latencias = []
+    linhas = 0
+    inicio = time.perf_counter()
+    for indice, _ in enumerate(iterar_respostas(arquivo, mapeamento, args.motor_csv), start=1):
+        linhas = indice
+        if indice % TAMANHO_BLOCO == 0:
+            agora = time.perf_counter()
+            latencias.append(agora - inicio)
+            inicio = agora
+    if linhas % TAMANHO_BLOCO:
+        latencias.append(time.perf_counter() - inicio)
+    return latencias, linhas
+
+
+def medir(nome, funcao, motor, args, csv_bytes):
+    duracoes = []
+    latencias = []
+    itens = 0
+    for _ in range(args.repeticoes):
+        inicio = time.perf_counter()
+        latencias_execucao, itens_execucao = funcao(motor, args, csv_bytes)
+        duracoes.append(time.perf_counter() - inicio)
+        # Sem latências por item, a latência é a da execução inteira
+        latencias.extend(latencias_execucao or [duracoes[-1]])
+        itens += itens_execucao
+
+    tracemalloc.start()
+    funcao(motor, args, csv_bytes)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "cenario": nome,
+        "itens": itens,
+        "segundos": sum(duracoes),
+        "vazao_por_segundo": itens / sum(duracoes),
+        "p50_ms": percentil(latencias, 50) * 1000,
+        "p95_ms": percentil(latencias, 95) * 1000,
+        "pico_tracemalloc_mb": pico / 1024 ** 2,
+        # ru_maxrss é em KB no Linux
+        "rss_maximo_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def imprimir(medicoes, base=None):
+    base = {m["cenario"]: m for m in base or []}
+    print(f"{'cenário':<8} {'itens':>7} {'vazão/s':>10} {'p50 ms':>10} {'p95 ms':>10} {'pico MB':>9} {'RSS MB':>8}")
+    for m in medicoes:
+        print(f"{m['cenario']:<8} {m['itens']:>7} {m['vazao_por_segundo']:>10.1f} {m['p50_ms']:>10.1f} "
+              f"{m['p95_ms']:>10.1f} {m['pico_tracemalloc_mb']:>9.1f} {m['rss_maximo_mb']:>8.1f}")
+        anterior = base.get(m["cenario"])
+        if anterior:
+            variacoes = [
+                f"{rotulo} {(m[campo] / anterior[campo] - 1) * 100:+.1f}%"
+                for rotulo, campo in (("vazão", "vazao_por_segundo"), ("p50", "p50_ms"), ("p95", "p95_ms"),
+                                      ("pico", "pico_tracemalloc_mb"))
+                if anterior[campo]
+            ]
+            print(f"{'':<8} vs. base: {', '.join(variacoes)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de ponta a ponta do gerador de briefings (offline)")
+    parser.add_argument("--cenarios", default=",".join(CENARIOS),
+                        help=f"Cenários separados por vírgula ({', '.join(CENARIOS)})")
+    parser.add_argument("--latencia", type=float, default=0.5, help="Tempo total simulado de cada chamada (s)")
+    parser.add_argument("--latencia-primeiro-trecho", type=float, default=0.1)
+    parser.add_argument("--tokens-saida", type=int, default=800)
+    parser.add_argument("--linhas-lote", type=int, default=50)
+    parser.add_argument("--simultaneas", type=int, default=8)
+    parser.add_argument("--linhas-csv", type=int, default=20_000)
+    parser.add_argument("--colunas-extras", type=int, default=20,
+                        help="Colunas do CSV grande que não correspondem a perguntas")
+    parser.add_argument("--motor-csv", choices=("c", "pyarrow"), default="c")
+    parser.add_argument("--por-secoes", action="store_true", help="Gera por seções em paralelo")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--json", help="Grava as medições neste arquivo")
+    parser.add_argument("--comparar", help="Arquivo JSON de uma execução anterior para comparação")
+    args = parser.parse_args()
+
+    cenarios = [c.strip() for c in args.cenarios.split(",") if c.strip()]
+    desconhecidos = set(cenarios) - set(CENARIOS)
+    if desconhecidos:
+        parser.error(f"Cenários desconhecidos: {', '.join(sorted(desconhecidos))}")
+
+    entradas = {
+        "unico": (cenario_unico, lambda: gerar_csv(1)),
+        "lote": (cenario_lote, lambda: gerar_csv(args.linhas_lote)),
+        "csv": (cenario_csv, lambda: gerar_csv(args.linhas_csv, args.colunas_extras)),
+    }
+    medicoes = []
+    with tempfile.TemporaryDirectory() as diretorio:
+        motor = criar_motor(args, diretorio)
+        for nome in cenarios:
+            funcao, gerar_entrada = entradas[nome]
+            medicoes.append(medir(nome, funcao, motor, args, gerar_entrada()))
+
+    base = None
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as arquivo:
+            base = json.load(arquivo)["medicoes"]
+    imprimir(medicoes, base)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as arquivo:
+            json.dump({"parametros": vars(args), "medicoes": medicoes}, arquivo, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
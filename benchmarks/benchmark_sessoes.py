@@ -0,0 +1,156 @@
+# Benchmark de reruns do app com várias sessões simultâneas.
+#
+# Usa o AppTest do Streamlit para simular --sessoes sessões do main.py no mesmo
+# processo (compartilhando motor, cache e histórico, como no servidor) com o
+# backend local (BRIEFING_BACKEND=local), sem rede. Cada sessão percorre os
+# passos abaixo, intercalados entre as sessões para que todas fiquem vivas:
+#   - primeira execução da página;
+#   - preenchimento do formulário;
+#   - troca de um campo condicional (SEO);
+#   - envio do formulário (geração do briefing);
+#   - rerun com o briefing já na sessão (ex.: troca de opção na barra lateral);
+#   - busca no histórico.
+#
+# São reportados o tempo de execução do script por passo (p50/p95) e a memória
+# do servidor por sessão (tracemalloc, medido em uma execução à parte para não
+# distorcer os tempos). O AppTest sempre executa o script inteiro, mesmo para
+# widgets dentro de st.fragment; os tempos são, portanto, o limite superior de
+# uma interação isolada em fragmento.
+#
+# Uso: python benchmarks/benchmark_sessoes.py [--sessoes 20] [--latencia 0.05]
+#      [--json resultado.json]
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from estatisticas import percentil
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PASSOS = ["primeira_execucao", "preencher_formulario", "campo_condicional", "enviar", "rerun_com_resultado",
+          "buscar_historico"]
+
+CODIGO_SESSOES = """
+import json, sys, time, tracemalloc
+from streamlit.testing.v1 import AppTest
+
+parametros = json.loads(sys.argv[1])
+medir_memoria = parametros["medir_memoria"]
+
+def preencher(app, sessao):
+    for campo in list(app.text_input) + list(app.text_area):
+        if campo.label != "Buscar no histórico":
+            campo.set_value(f"Empresa {sessao}" if campo.key == "nome_empresa" else "resposta de teste")
+
+def enviar(app):
+    next(botao for botao in app.button if botao.label == "Gerar Briefing Completo").click()
+
+def buscar(app):
+    next(campo for campo in app.sidebar.text_input if campo.label == "Buscar no histórico").set_value("empresa")
+
+acoes = {
+    "primeira_execucao": lambda app, sessao: None,
+    "preencher_formulario": preencher,
+    "campo_condicional": lambda app, sessao: app.radio(key="seo").set_value("Não"),
+    "enviar": lambda app, sessao: enviar(app),
+    "rerun_com_resultado": lambda app, sessao: app.sidebar.toggle[0].set_value(False),
+    "buscar_historico": lambda app, sessao: buscar(app),
+}
+
+if medir_memoria:
+    tracemalloc.start()
+sessoes = [AppTest.from_file("main.py", default_timeout=120) for _ in range(parametros["sessoes"])]
+# A primeira sessão aquece imports e recursos compartilhados (st.cache_resource)
+sessoes[0].run()
+if medir_memoria:
+    base, _ = tracemalloc.get_traced_memory()
+
+tempos = {passo: [] for passo in parametros["passos"]}
+erros = []
+for passo in parametros["passos"]:
+    for indice, app in enumerate(sessoes):
+        if passo == "primeira_execucao" and indice == 0:
+            continue
+        acoes[passo](app, indice)
+        inicio = time.perf_counter()
+        app.run()
+        tempos[passo].append(time.perf_counter() - inicio)
+        erros.extend(str(erro.value) for erro in app.exception)
+
+resultado = {"tempos": tempos, "erros": erros[:5]}
+if medir_memoria:
+    atual, pico = tracemalloc.get_traced_memory()
+    resultado["memoria_por_sessao"] = (atual - base) / len(sessoes)
+    resultado["pico"] = pico
+print(json.dumps(resultado))
+"""
+
+
+def executar(parametros, ambiente):
+    processo = subprocess.run(
+        [sys.executable, "-c", CODIGO_SESSOES, json.dumps(parametros)],
+        cwd=RAIZ,
+        env=ambiente,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(processo.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de reruns do app com várias sessões (AppTest)")
+    parser.add_argument("--sessoes", type=int, default=20)
+    parser.add_argument("--latencia", type=float, default=0.05, help="Tempo simulado de cada chamada ao modelo (s)")
+    parser.add_argument("--tokens-saida", type=int, default=800)
+    parser.add_argument("--json", help="Grava as medições neste arquivo")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        ambiente = dict(
+            os.environ,
+            BRIEFING_BACKEND="local",
+            BRIEFING_LOCAL_LATENCIA=str(args.latencia),
+            BRIEFING_LOCAL_LATENCIA_PRIMEIRO_TRECHO=str(args.latencia / 4),
+            BRIEFING_LOCAL_TOKENS_SAIDA=str(args.tokens_saida),
+            BRIEFING_CACHE_CAMINHO=os.path.join(diretorio, "cache.db"),
+            BRIEFING_HISTORICO_CAMINHO=os.path.join(diretorio, "historico.db"),
+        )
+        parametros = {"sessoes": args.sessoes, "passos": PASSOS, "medir_memoria": False}
+        tempos = executar(parametros, ambiente)
+        memoria = executar(dict(parametros, medir_memoria=True), dict(
+            ambiente,
+            BRIEFING_CACHE_CAMINHO=os.path.join(diretorio, "cache_memoria.db"),
+            BRIEFING_HISTORICO_CAMINHO=os.path.join(diretorio, "historico_memoria.db"),
+        ))
+
+    print(f"{args.sessoes} sessões, tempo do script por rerun")
+    print(f"  {'passo':<22} {'p50 ms':>9} {'p95 ms':>9} {'média ms':>9}")
+    medicoes = {"sessoes": args.sessoes, "passos": {}}
+    for passo in PASSOS:
+        valores = tempos["tempos"][passo]
+        medicoes["passos"][passo] = {
+            "p50_ms": percentil(valores, 50) * 1000,
+            "p95_ms": percentil(valores, 95) * 1000,
+            "media_ms": statistics.mean(valores) * 1000,
+        }
+        print(f"  {passo:<22} {medicoes['passos'][passo]['p50_ms']:>9.1f} "
+              f"{medicoes['passos'][passo]['p95_ms']:>9.1f} {medicoes['passos'][passo]['media_ms']:>9.1f}")
+    medicoes["memoria_por_sessao_mb"] = memoria["memoria_por_sessao"] / 1024 ** 2
+    print(f"Memória por sessão (tracemalloc): {medicoes['memoria_por_sessao_mb']:.2f} MB")
+
+    if tempos["erros"]:
+        print(f"ERRO: o script gerou exceções: {tempos['erros']}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as arquivo:
+            json.dump(medicoes, arquivo, indent=2, ensure_ascii=False)
+    sys.exit(1 if tempos["erros"] else 0)
+
+
+if __name__ == "__main__":
+    main()
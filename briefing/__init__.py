@@ -0,0 +1 @@
+# Componentes do gerador de briefings que não dependem da interface Streamlit
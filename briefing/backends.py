@@ -0,0 +1,156 @@
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass
+
+MODELO_GEMINI = 'gemini-1.5-flash'
+
+
+# Resposta completa de um backend
+@dataclass
+class RespostaModelo:
+    texto: str
+    tokens_entrada: int = 0
+    tokens_saida: int = 0
+
+
+# Resposta em streaming: iterar devolve os trechos de texto; os tokens ficam
+# disponíveis depois que a iteração termina
+class RespostaTransmitida:
+    def __init__(self, trechos, contar_tokens=None):
+        self.tokens_entrada = 0
+        self.tokens_saida = 0
+        self._trechos = trechos
+        self._contar_tokens = contar_tokens
+
+    def __iter__(self):
+        yield from self._trechos
+        if self._contar_tokens is not None:
+            self.tokens_entrada, self.tokens_saida = self._contar_tokens()
+
+
+# Backends implementam `nome`, `gerar(prompt) -> RespostaModelo` e
+# `transmitir(prompt) -> RespostaTransmitida`. Erros transitórios devem expor
+# o código HTTP em `code`, como as exceções de google.api_core, para que o
+# limitador de taxa tente novamente.
+class BackendGemini:
+    def __init__(self, modelo=MODELO_GEMINI, api_key=None):
+        self.nome = modelo
+        self._api_key = api_key
+        self._cliente = None
+        self._lock = threading.Lock()
+
+    # Cliente criado uma única vez, na primeira chamada. O SDK é importado aqui
+    # para não pesar na inicialização de quem importa o backend.
+    @property
+    def cliente(self):
+        if self._cliente is None:
+            with self._lock:
+                if self._cliente is None:
+                    import google.generativeai as genai
+
+                    genai.configure(api_key=self._api_key)
+                    self._cliente = genai.GenerativeModel(self.nome)
+        return self._cliente
+
+    @staticmethod
+    def _tokens(response):
+        uso = getattr(response, "usage_metadata", None)
+        return getattr(uso, "prompt_token_count", 0) or 0, getattr(uso, "candidates_token_count", 0) or 0
+
+    def gerar(self, prompt):
+        response = self.cliente.generate_content(prompt)
+        return RespostaModelo(response.text, *self._tokens(response))
+
+    # O SDK já faz a requisição aqui, então erros de limite aparecem antes da iteração
+    def transmitir(self, prompt):
+        response = self.cliente.generate_content(prompt, stream=True)
+        return RespostaTransmitida((chunk.text for chunk in response), lambda: self._tokens(response))
+
+
+class ErroSimulado(Exception):
+    code = 503
+
+
+_VOCABULARIO = (
+    "site", "cliente", "projeto", "conteúdo", "página", "usuário", "design", "objetivo", "público",
+    "integração", "desempenho", "navegação", "conversão", "identidade", "visual", "requisito",
+    "funcionalidade", "prazo", "responsivo", "institucional", "estratégia", "marca", "formulário",
+)
+
+
+# Backend local e determinístico, sem rede, para testes e benchmarks. Simula a
+# latência (tempo até o primeiro trecho e tempo total), o tamanho da saída e,
+# opcionalmente, uma taxa de falhas transitórias. O texto depende apenas da
+# semente e do prompt; as falhas, da semente, do prompt e de quantas vezes ele
+# já foi enviado (assim novas tentativas podem ter sucesso e o resultado não
+# depende da ordem entre threads).
+class BackendLocal:
+    def __init__(self, latencia=1.0, latencia_primeiro_trecho=0.2, tokens_saida=800, trechos=20,
+                 taxa_falhas=0.0, semente=0):
+        self.nome = "local"
+        self.latencia = latencia
+        self.latencia_primeiro_trecho = min(latencia_primeiro_trecho, latencia)
+        self.tokens_saida = tokens_saida
+        self.trechos = max(1, trechos)
+        self.taxa_falhas = taxa_falhas
+        self.semente = semente
+        self._envios = {}
+        self._lock = threading.Lock()
+
+    def _texto(self, prompt):
+        aleatorio = random.Random(f"{self.semente}:{prompt}")
+        palavras = []
+        caracteres = 0
+        # Aproximadamente 4 caracteres por token, como na estimativa do prompt
+        while caracteres < self.tokens_saida * 4:
+            palavras.append(aleatorio.choice(_VOCABULARIO))
+            caracteres += len(palavras[-1]) + 1
+        linhas = [" ".join(palavras[i:i + 12]) for i in range(0, len(palavras), 12)]
+        return "\n".join(f"## Seção {i + 1}" if i % 8 == 0 else f"- {linha}" for i, linha in enumerate(linhas))
+
+    def _talvez_falhar(self, prompt):
+        if not self.taxa_falhas:
+            return
+        with self._lock:
+            envio = self._envios.get(prompt, 0)
+            self._envios[prompt] = envio + 1
+        if random.Random(f"{self.semente}:{envio}:{prompt}").random() < self.taxa_falhas:
+            raise ErroSimulado("Falha transitória simulada")
+
+    def _tokens_entrada(self, prompt):
+        return -(-len(prompt) // 4)
+
+    def gerar(self, prompt):
+        self._talvez_falhar(prompt)
+        time.sleep(self.latencia)
+        texto = self._texto(prompt)
+        return RespostaModelo(texto, self._tokens_entrada(prompt), self.tokens_saida)
+
+    def transmitir(self, prompt):
+        self._talvez_falhar(prompt)
+        time.sleep(self.latencia_primeiro_trecho)
+        texto = self._texto(prompt)
+        tamanho = -(-len(texto) // self.trechos)
+        intervalo = (self.latencia - self.latencia_primeiro_trecho) / self.trechos
+
+        def trechos():
+            for inicio in range(0, len(texto), tamanho):
+                if inicio:
+                    time.sleep(intervalo)
+                yield texto[inicio:inicio + tamanho]
+
+        return RespostaTransmitida(trechos(), lambda: (self._tokens_entrada(prompt), self.tokens_saida))
+
+
+# Backend escolhido por BRIEFING_BACKEND ("gemini" ou "local")
+def backend_do_ambiente():
+    if os.getenv("BRIEFING_BACKEND", "gemini") == "local":
+        return BackendLocal(
+            latencia=float(os.getenv("BRIEFING_LOCAL_LATENCIA", "1.0")),
+            latencia_primeiro_trecho=float(os.getenv("BRIEFING_LOCAL_LATENCIA_PRIMEIRO_TRECHO", "0.2")),
+            tokens_saida=int(os.getenv("BRIEFING_LOCAL_TOKENS_SAIDA", "800")),
+            taxa_falhas=float(os.getenv("BRIEFING_LOCAL_TAXA_FALHAS", "0")),
+        )
+    return BackendGemini(MODELO_GEMINI, os.getenv("GEM_API_KEY"))
@@ -0,0 +1,110 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+
+# Normaliza as respostas para que variações irrelevantes (espaços, NaN vindo do
+# pandas, tipos diferentes) resultem na mesma chave de cache
+def normalizar_respostas(respostas):
+    normalizadas = {}
+    for campo, valor in respostas.items():
+        if valor is None or valor != valor:  # None ou NaN
+            valor = ""
+        normalizadas[campo] = " ".join(str(valor).split())
+    return normalizadas
+
+
+# Chave endereçada por conteúdo: respostas normalizadas + versão do prompt + modelo
+def calcular_chave(respostas, versao_prompt, modelo):
+    conteudo = json.dumps(
+        {
+            "respostas": normalizar_respostas(respostas),
+            "versao_prompt": versao_prompt,
+            "modelo": modelo,
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()
+
+
+# Cache persistente de briefings em SQLite com expiração por tempo (TTL) e
+# remoção dos itens menos acessados quando os limites de tamanho são excedidos
+class CacheBriefing:
+    def __init__(self, caminho, ttl_segundos=7 * 24 * 3600, max_entradas=1000, max_bytes=100 * 1024 * 1024):
+        self.ttl_segundos = ttl_segundos
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conexao = sqlite3.connect(caminho, check_same_thread=False)
+        with self._lock, self._conexao:
+            self._conexao.execute("PRAGMA journal_mode=WAL")
+            self._conexao.execute(
+                """
+                CREATE TABLE IF NOT EXISTS briefings_cache (
+                    chave TEXT PRIMARY KEY,
+                    briefing TEXT NOT NULL,
+                    criado_em REAL NOT NULL,
+                    acessado_em REAL NOT NULL,
+                    tamanho INTEGER NOT NULL
+                )
+                """
+            )
+            self._conexao.execute(
+                "CREATE INDEX IF NOT EXISTS idx_briefings_cache_acessado_em ON briefings_cache (acessado_em)"
+            )
+
+    def obter(self, chave):
+        agora = time.time()
+        with self._lock, self._conexao:
+            linha = self._conexao.execute(
+                "SELECT briefing FROM briefings_cache WHERE chave = ? AND criado_em >= ?",
+                (chave, agora - self.ttl_segundos),
+            ).fetchone()
+            if linha is None:
+                return None
+            self._conexao.execute(
+                "UPDATE briefings_cache SET acessado_em = ? WHERE chave = ?", (agora, chave)
+            )
+        return linha[0]
+
+    def salvar(self, chave, briefing):
+        agora = time.time()
+        with self._lock, self._conexao:
+            self._conexao.execute(
+                "INSERT OR REPLACE INTO briefings_cache (chave, briefing, criado_em, acessado_em, tamanho) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (chave, briefing, agora, agora, len(briefing.encode("utf-8"))),
+            )
+            self._remover_excedentes(agora)
+
+    def remover(self, chave):
+        with self._lock, self._conexao:
+            self._conexao.execute("DELETE FROM briefings_cache WHERE chave = ?", (chave,))
+
+    # Deve ser chamado com o lock adquirido e dentro de uma transação
+    def _remover_excedentes(self, agora):
+        self._conexao.execute(
+            "DELETE FROM briefings_cache WHERE criado_em < ?", (agora - self.ttl_segundos,)
+        )
+        self._conexao.execute(
+            """
+            DELETE FROM briefings_cache WHERE chave IN (
+                SELECT chave FROM briefings_cache ORDER BY acessado_em DESC LIMIT -1 OFFSET ?
+            )
+            """,
+            (self.max_entradas,),
+        )
+        self._conexao.execute(
+            """
+            DELETE FROM briefings_cache WHERE chave IN (
+                SELECT chave FROM (
+                    SELECT chave, SUM(tamanho) OVER (ORDER BY acessado_em DESC, chave) AS acumulado
+                    FROM briefings_cache
+                ) WHERE acumulado > ?
+            )
+            """,
+            (self.max_bytes,),
+        )
@@ -0,0 +1,263 @@
+import hashlib
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+import unicodedata
+import zipfile
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+# Incrementar sempre que a renderização mudar, para não reaproveitar artefatos antigos
+VERSAO_EXPORTACAO = "1"
+
+# Extensão e tipo MIME de cada formato de exportação
+FORMATOS = {
+    "md": ("md", "text/markdown"),
+    "docx": ("docx", "application/vnd.openxmlformats-officedocument.wordprocessingml.document"),
+    "pdf": ("pdf", "application/pdf"),
+}
+
+_PADRAO_TITULO = re.compile(r"(#{1,6})\s+(.*)")
+_PADRAO_ITEM = re.compile(r"([-*+])\s+(.*)")
+_PADRAO_NUMERADO = re.compile(r"\d+[.)]\s+(.*)")
+_PADRAO_NEGRITO = re.compile(r"(\*\*[^*]+\*\*)")
+
+# Caracteres comuns fora do Latin-1 (fontes padrão do PDF) e seus equivalentes
+_SUBSTITUICOES_PDF = str.maketrans({"–": "-", "—": "-", "“": '"', "”": '"', "‘": "'", "’": "'", "…": "...", "•": "-"})
+
+
+# Blocos de um texto Markdown simples, como o gerado para os briefings:
+# (tipo, nível, texto), com tipo "titulo", "item", "numerado" ou "paragrafo".
+# Em itens, o nível é a profundidade pela indentação.
+def blocos_markdown(texto):
+    for linha in texto.splitlines():
+        conteudo = linha.strip()
+        if not conteudo:
+            continue
+        recuo = (len(linha) - len(linha.lstrip())) // 2
+        if encontrado := _PADRAO_TITULO.fullmatch(conteudo):
+            yield "titulo", len(encontrado.group(1)), encontrado.group(2)
+        elif encontrado := _PADRAO_ITEM.fullmatch(conteudo):
+            yield "item", recuo, encontrado.group(2)
+        elif encontrado := _PADRAO_NUMERADO.fullmatch(conteudo):
+            yield "numerado", recuo, encontrado.group(1)
+        else:
+            yield "paragrafo", 0, conteudo
+
+
+# Trechos (texto, negrito) de uma linha com **negrito**
+def trechos_negrito(texto):
+    for parte in _PADRAO_NEGRITO.split(texto):
+        if parte.startswith("**") and parte.endswith("**") and len(parte) > 4:
+            yield parte[2:-2], True
+        elif parte:
+            yield parte, False
+
+
+def renderizar_docx(texto, destino):
+    from docx import Document
+
+    documento = Document()
+    for tipo, nivel, conteudo in blocos_markdown(texto):
+        if tipo == "titulo":
+            documento.add_heading(conteudo.replace("**", ""), level=min(nivel - 1, 4))
+            continue
+        estilo = {"item": "List Bullet", "numerado": "List Number"}.get(tipo)
+        if estilo and nivel:
+            estilo += f" {min(nivel + 1, 3)}"
+        paragrafo = documento.add_paragraph(style=estilo)
+        for trecho, negrito in trechos_negrito(conteudo):
+            paragrafo.add_run(trecho).bold = negrito
+    documento.save(destino)
+
+
+# PDF com as fontes padrão (Latin-1, suficiente para português); caracteres
+# fora do Latin-1, como emojis, são descartados
+def renderizar_pdf(texto, destino):
+    from fpdf import FPDF
+
+    def latin1(conteudo):
+        return conteudo.translate(_SUBSTITUICOES_PDF).encode("latin-1", "ignore").decode("latin-1")
+
+    pdf = FPDF()
+    pdf.set_auto_page_break(True, margin=15)
+    pdf.add_page()
+    margem = pdf.l_margin
+    tamanhos_titulo = {1: 18, 2: 14, 3: 12}
+    for tipo, nivel, conteudo in blocos_markdown(texto):
+        conteudo = latin1(conteudo)
+        if tipo == "titulo":
+            tamanho = tamanhos_titulo.get(nivel, 11)
+            pdf.set_font("Helvetica", "B", tamanho)
+            pdf.ln(3)
+            pdf.multi_cell(0, tamanho * 0.5, conteudo.replace("**", ""), new_x="LMARGIN", new_y="NEXT")
+            pdf.ln(1)
+            continue
+
+        pdf.set_font("Helvetica", "", 11)
+        if tipo in ("item", "numerado"):
+            pdf.set_left_margin(margem + 5 * (nivel + 1))
+            pdf.set_x(pdf.l_margin)
+            pdf.write(6, "- " if tipo == "item" else "")
+        for trecho, negrito in trechos_negrito(conteudo):
+            pdf.set_font("Helvetica", "B" if negrito else "", 11)
+            pdf.write(6, trecho)
+        pdf.ln(7)
+        pdf.set_left_margin(margem)
+    pdf.output(destino)
+
+
+_RENDERIZADORES = {"docx": renderizar_docx, "pdf": renderizar_pdf}
+
+
+# Executado nos processos do pool (ou na thread de quem chamou, para Markdown):
+# renderiza em um arquivo temporário de nome único e o move para `caminho`, de
+# modo que um artefato pela metade nunca seja reaproveitado. Renderizações
+# simultâneas do mesmo texto gravam o mesmo conteúdo; a última a terminar
+# substitui o arquivo e todas retornam o caminho.
+def _renderizar_arquivo(formato, texto, caminho):
+    descritor, temporario = tempfile.mkstemp(dir=os.path.dirname(caminho), suffix=".tmp")
+    try:
+        with os.fdopen(descritor, "wb") as arquivo:
+            if formato == "md":
+                arquivo.write(texto.encode("utf-8"))
+        if formato != "md":
+            _RENDERIZADORES[formato](texto, temporario)
+        os.replace(temporario, caminho)
+    except BaseException:
+        try:
+            os.remove(temporario)
+        except FileNotFoundError:
+            pass
+        raise
+    return caminho
+
+
+# Nome de arquivo seguro a partir do nome da empresa
+def nome_arquivo(nome):
+    nome = unicodedata.normalize("NFKD", str(nome or "")).encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"[^A-Za-z0-9]+", "_", nome).strip("_")[:60] or "briefing"
+
+
+# Exporta briefings em Markdown, DOCX e PDF. A renderização roda em um pool de
+# processos (criado sob demanda) e cada artefato fica guardado em `diretorio`
+# pelo hash do conteúdo, sendo reaproveitado enquanto o briefing não mudar; o
+# diretório é limitado a `max_bytes`, removendo os artefatos usados há mais tempo.
+class ExportadorBriefings:
+    def __init__(self, diretorio, max_processos=None, max_bytes=500 * 1024 * 1024):
+        self.diretorio = diretorio
+        self.max_processos = max_processos or min(4, os.cpu_count() or 1)
+        self.max_bytes = max_bytes
+        self._pool = None
+        self._lock = threading.Lock()
+        os.makedirs(diretorio, exist_ok=True)
+
+    @classmethod
+    def do_ambiente(cls):
+        return cls(
+            os.getenv("BRIEFING_EXPORTACAO_DIRETORIO", os.path.join(tempfile.gettempdir(), "briefings_exportados")),
+            max_processos=int(os.getenv("BRIEFING_EXPORTACAO_PROCESSOS", "0")) or None,
+            max_bytes=int(float(os.getenv("BRIEFING_EXPORTACAO_MAX_MB", "500")) * 1024 * 1024),
+        )
+
+    # "spawn" evita copiar as threads do servidor (Streamlit/uvicorn) para os filhos
+    @property
+    def pool(self):
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ProcessPoolExecutor(
+                        self.max_processos, mp_context=multiprocessing.get_context("spawn")
+                    )
+        return self._pool
+
+    def fechar(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def caminho_artefato(self, texto, formato):
+        conteudo = f"{VERSAO_EXPORTACAO}\0{formato}\0{texto}".encode("utf-8")
+        return os.path.join(self.diretorio, f"{hashlib.sha256(conteudo).hexdigest()}.{FORMATOS[formato][0]}")
+
+    # Caminho do artefato (ou ZIP) já gravado, marcando-o como usado, ou None
+    def reaproveitar(self, caminho):
+        try:
+            os.utime(caminho)
+            return caminho
+        except FileNotFoundError:
+            return None
+
+    # Novo arquivo (aberto para escrita binária) para um ZIP exportado, no
+    # diretório do exportador: entra na limpeza por tamanho junto com os
+    # artefatos, de modo que ZIPs de sessões encerradas não ficam no disco
+    def novo_zip(self):
+        return tempfile.NamedTemporaryFile(dir=self.diretorio, prefix="lote_", suffix=".zip", delete=False)
+
+    # Renderiza (ou reaproveita) um único artefato e retorna seu caminho
+    def artefato(self, texto, formato):
+        caminho = self.caminho_artefato(texto, formato)
+        if self.reaproveitar(caminho):
+            return caminho
+        if formato == "md":
+            return _renderizar_arquivo(formato, texto, caminho)
+        return self.pool.submit(_renderizar_arquivo, formato, texto, caminho).result()
+
+    # Escreve em `destino` (caminho ou arquivo binário) um ZIP com os briefings de
+    # `itens`, pares (nome, texto), em cada um dos `formatos`. Cada artefato é
+    # gravado no ZIP assim que fica pronto e no máximo o dobro do número de
+    # processos fica pendente, de modo que a memória não cresce com o lote.
+    # `ao_concluir(concluidos, total)` é chamado na thread de quem chamou.
+    def exportar_zip(self, itens, formatos, destino, ao_concluir=None):
+        tarefas = [
+            (f"{indice:03d}_{nome_arquivo(nome)}.{FORMATOS[formato][0]}", formato, texto)
+            for indice, (nome, texto) in enumerate(itens, start=1)
+            for formato in formatos
+        ]
+        total = len(tarefas)
+        concluidos = 0
+        pendentes = {}
+        fila = deque(tarefas)
+        with zipfile.ZipFile(destino, "w", zipfile.ZIP_DEFLATED) as arquivo_zip:
+            def gravar(nome_no_zip, caminho):
+                nonlocal concluidos
+                arquivo_zip.write(caminho, nome_no_zip)
+                concluidos += 1
+                if ao_concluir:
+                    ao_concluir(concluidos, total)
+
+            while fila or pendentes:
+                while fila and len(pendentes) < 2 * self.max_processos:
+                    nome_no_zip, formato, texto = fila.popleft()
+                    caminho = self.caminho_artefato(texto, formato)
+                    if self.reaproveitar(caminho):
+                        gravar(nome_no_zip, caminho)
+                    elif formato == "md":
+                        gravar(nome_no_zip, _renderizar_arquivo(formato, texto, caminho))
+                    else:
+                        pendentes[self.pool.submit(_renderizar_arquivo, formato, texto, caminho)] = nome_no_zip
+                if pendentes:
+                    prontos, _ = wait(pendentes, return_when=FIRST_COMPLETED)
+                    for futuro in prontos:
+                        gravar(pendentes.pop(futuro), futuro.result())
+        self._limpar()
+        return total
+
+    # Remove os artefatos e ZIPs usados há mais tempo até o diretório caber em max_bytes
+    def _limpar(self):
+        artefatos = []
+        for entrada in os.scandir(self.diretorio):
+            if entrada.is_file() and not entrada.name.endswith(".tmp"):
+                informacoes = entrada.stat()
+                artefatos.append((informacoes.st_mtime, informacoes.st_size, entrada.path))
+        tamanho_total = sum(tamanho for _, tamanho, _ in artefatos)
+        for _, tamanho, caminho in sorted(artefatos):
+            if tamanho_total <= self.max_bytes:
+                break
+            try:
+                os.remove(caminho)
+            except FileNotFoundError:
+                pass
+            tamanho_total -= tamanho
@@ -0,0 +1,161 @@
+import json
+import sqlite3
+import threading
+import time
+
+# Itens por página na listagem e na busca
+TAMANHO_PAGINA = 20
+
+_MAIOR_ID = 2 ** 63 - 1
+
+# Colunas devolvidas na listagem e na busca (sem o texto do briefing nem as respostas)
+_COLUNAS_RESUMO = (
+    "b.id, b.criado_em, b.nome_empresa, b.modelo, b.por_secoes, b.do_cache, b.duracao, "
+    "b.tokens_entrada, b.tokens_saida"
+)
+
+
+# Converte o texto digitado em uma consulta FTS5: cada palavra vira um prefixo
+# entre aspas, de modo que operadores e caracteres especiais não quebrem a busca
+def consulta_fts(termo):
+    palavras = termo.split()
+    return " ".join('"' + palavra.replace('"', '""') + '"*' for palavra in palavras)
+
+
+# Histórico persistente dos briefings gerados, em SQLite. O índice FTS5 sobre
+# nome da empresa e conteúdo (sem acentos) é mantido por gatilhos. Listagem e
+# busca vêm do mais recente para o mais antigo e são paginadas por cursor (o id
+# do último item), sem OFFSET nem carregar tudo em memória; ordenar a busca por
+# relevância exigiria pontuar todos os resultados a cada consulta.
+class HistoricoBriefings:
+    def __init__(self, caminho):
+        self._lock = threading.Lock()
+        self._conexao = sqlite3.connect(caminho, check_same_thread=False)
+        self._conexao.row_factory = sqlite3.Row
+        with self._lock, self._conexao:
+            self._conexao.execute("PRAGMA journal_mode=WAL")
+            self._conexao.execute(
+                """
+                CREATE TABLE IF NOT EXISTS briefings (
+                    id INTEGER PRIMARY KEY,
+                    chave TEXT NOT NULL,
+                    criado_em REAL NOT NULL,
+                    nome_empresa TEXT NOT NULL,
+                    briefing TEXT NOT NULL,
+                    respostas TEXT NOT NULL,
+                    modelo TEXT NOT NULL,
+                    por_secoes INTEGER NOT NULL,
+                    do_cache INTEGER NOT NULL,
+                    duracao REAL,
+                    tempo_primeiro_trecho REAL,
+                    tokens_prompt_estimados INTEGER NOT NULL DEFAULT 0,
+                    tokens_entrada INTEGER NOT NULL DEFAULT 0,
+                    tokens_saida INTEGER NOT NULL DEFAULT 0
+                )
+                """
+            )
+            self._conexao.execute("CREATE INDEX IF NOT EXISTS idx_briefings_chave ON briefings (chave)")
+            self._conexao.execute(
+                """
+                CREATE VIRTUAL TABLE IF NOT EXISTS briefings_fts USING fts5(
+                    nome_empresa, briefing, content='briefings', content_rowid='id',
+                    tokenize='unicode61 remove_diacritics 2'
+                )
+                """
+            )
+            self._conexao.executescript(
+                """
+                CREATE TRIGGER IF NOT EXISTS briefings_fts_inserir AFTER INSERT ON briefings BEGIN
+                    INSERT INTO briefings_fts (rowid, nome_empresa, briefing)
+                    VALUES (new.id, new.nome_empresa, new.briefing);
+                END;
+                CREATE TRIGGER IF NOT EXISTS briefings_fts_remover AFTER DELETE ON briefings BEGIN
+                    INSERT INTO briefings_fts (briefings_fts, rowid, nome_empresa, briefing)
+                    VALUES ('delete', old.id, old.nome_empresa, old.briefing);
+                END;
+                """
+            )
+
+    # Registra um resultado de MotorBriefing.gerar/transmitir. Briefings vindos do
+    # cache só são registrados se a mesma chave ainda não estiver no histórico.
+    # Retorna o id do registro (ou None se já existia).
+    def registrar(self, chave, respostas, resultado, modelo, por_secoes=False, duracao=None):
+        with self._lock, self._conexao:
+            if resultado["do_cache"] and self._conexao.execute(
+                "SELECT 1 FROM briefings WHERE chave = ? LIMIT 1", (chave,)
+            ).fetchone():
+                return None
+            cursor = self._conexao.execute(
+                "INSERT INTO briefings (chave, criado_em, nome_empresa, briefing, respostas, modelo, por_secoes, "
+                "do_cache, duracao, tempo_primeiro_trecho, tokens_prompt_estimados, tokens_entrada, tokens_saida) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    chave,
+                    time.time(),
+                    str(respostas.get("nome_empresa") or ""),
+                    resultado["briefing"],
+                    json.dumps(respostas, ensure_ascii=False, default=str),
+                    modelo,
+                    int(por_secoes),
+                    int(resultado["do_cache"]),
+                    duracao,
+                    resultado.get("tempo_primeiro_trecho"),
+                    resultado.get("tokens_prompt_estimados", 0),
+                    resultado.get("tokens_entrada", 0),
+                    resultado.get("tokens_saida", 0),
+                ),
+            )
+        return cursor.lastrowid
+
+    # Registro completo, com o briefing e as respostas
+    def obter(self, id_briefing):
+        with self._lock:
+            linha = self._conexao.execute("SELECT * FROM briefings WHERE id = ?", (id_briefing,)).fetchone()
+        if linha is None:
+            return None
+        registro = dict(linha)
+        registro["respostas"] = json.loads(registro["respostas"])
+        return registro
+
+    # Página de registros. Para a próxima página, passe em `antes` o cursor do
+    # último item recebido (ver cursor_pagina).
+    def listar(self, antes=None, limite=TAMANHO_PAGINA):
+        with self._lock:
+            return [
+                dict(linha)
+                for linha in self._conexao.execute(
+                    f"SELECT {_COLUNAS_RESUMO} FROM briefings b WHERE b.id < ? ORDER BY b.id DESC LIMIT ?",
+                    (_MAIOR_ID if antes is None else antes, limite),
+                )
+            ]
+
+    # Busca por nome da empresa e conteúdo (prefixos, sem diferenciar acentos),
+    # com um trecho do briefing em que os termos aparecem. Paginada como listar().
+    def buscar(self, termo, antes=None, limite=TAMANHO_PAGINA):
+        consulta = consulta_fts(termo)
+        if not consulta:
+            return []
+        with self._lock:
+            return [
+                dict(linha)
+                for linha in self._conexao.execute(
+                    f"SELECT {_COLUNAS_RESUMO}, snippet(briefings_fts, 1, '**', '**', '…', 12) AS trecho "
+                    "FROM briefings_fts JOIN briefings b ON b.id = briefings_fts.rowid "
+                    "WHERE briefings_fts MATCH ? AND briefings_fts.rowid < ? "
+                    "ORDER BY briefings_fts.rowid DESC LIMIT ?",
+                    (consulta, _MAIOR_ID if antes is None else antes, limite),
+                )
+            ]
+
+    def remover(self, id_briefing):
+        with self._lock, self._conexao:
+            self._conexao.execute("DELETE FROM briefings WHERE id = ?", (id_briefing,))
+
+    def contar(self):
+        with self._lock:
+            return self._conexao.execute("SELECT COUNT(*) FROM briefings").fetchone()[0]
+
+
+# Cursor de paginação do último item de uma página de listar() ou buscar()
+def cursor_pagina(itens):
+    return itens[-1]["id"] if itens else None
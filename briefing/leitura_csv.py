@@ -0,0 +1,92 @@
+import time
+
+import pandas as pd
+
+from briefing.mapeamento import mapear_colunas, mapear_csv_para_respostas
+from briefing.metricas import METRICAS
+
+# Linhas por bloco no motor padrão do pandas
+TAMANHO_BLOCO = 1000
+# Bytes por bloco no motor pyarrow (que divide o arquivo por tamanho, não por linhas)
+TAMANHO_BLOCO_BYTES = 4 * 1024 * 1024
+
+MOTORES = ("c", "pyarrow")
+
+
+# Lê apenas a linha de cabeçalho do CSV
+def ler_cabecalho(arquivo):
+    arquivo.seek(0)
+    colunas = list(pd.read_csv(arquivo, nrows=0).columns)
+    arquivo.seek(0)
+    return colunas
+
+
+# Lê o CSV em blocos contendo apenas `colunas`, sem carregar o arquivo inteiro.
+# Todas as células são lidas como texto; células vazias viram "". A leitura de
+# cada bloco é registrada nas métricas (etapa "leitura_csv").
+def ler_csv_em_blocos(arquivo, colunas, motor="c", tamanho_bloco=TAMANHO_BLOCO, tamanho_bloco_bytes=TAMANHO_BLOCO_BYTES):
+    blocos = _ler_blocos(arquivo, colunas, motor, tamanho_bloco, tamanho_bloco_bytes)
+    try:
+        while True:
+            inicio = time.perf_counter()
+            try:
+                bloco = next(blocos)
+            except StopIteration:
+                return
+            except Exception as e:
+                METRICAS.contar_erro("leitura_csv", e)
+                raise
+            METRICAS.observar("leitura_csv", time.perf_counter() - inicio)
+            yield bloco
+    finally:
+        blocos.close()
+
+
+def _ler_blocos(arquivo, colunas, motor, tamanho_bloco, tamanho_bloco_bytes):
+    if motor not in MOTORES:
+        raise ValueError(f"Motor de leitura desconhecido: {motor}")
+
+    arquivo.seek(0)
+    if motor == "pyarrow":
+        yield from _ler_blocos_pyarrow(arquivo, colunas, tamanho_bloco_bytes)
+        return
+
+    with pd.read_csv(arquivo, usecols=colunas, dtype=str, keep_default_na=False, chunksize=tamanho_bloco) as leitor:
+        yield from leitor
+
+
+def _ler_blocos_pyarrow(arquivo, colunas, tamanho_bloco_bytes):
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+
+    # Respostas em texto livre podem ter quebras de linha dentro das aspas
+    leitor = pa_csv.open_csv(
+        arquivo,
+        read_options=pa_csv.ReadOptions(block_size=tamanho_bloco_bytes),
+        parse_options=pa_csv.ParseOptions(newlines_in_values=True),
+        convert_options=pa_csv.ConvertOptions(
+            include_columns=colunas,
+            column_types={coluna: pa.string() for coluna in colunas},
+            strings_can_be_null=False,
+        ),
+    )
+    for lote in leitor:
+        yield lote.to_pandas()
+
+
+# Lê o cabeçalho e associa as colunas às perguntas do formulário
+def preparar_leitura(arquivo):
+    with METRICAS.medir("leitura_csv"):
+        colunas = tuple(ler_cabecalho(arquivo))
+    with METRICAS.medir("mapeamento"):
+        mapeamento = mapear_colunas(colunas)
+    if not mapeamento.colunas_usadas:
+        raise ValueError("Nenhuma coluna do CSV corresponde às perguntas do formulário")
+    return mapeamento
+
+
+# Percorre o CSV bloco a bloco devolvendo as respostas já no formato interno.
+# Apenas um bloco do arquivo fica em memória por vez.
+def iterar_respostas(arquivo, mapeamento, motor="c", **opcoes):
+    for bloco in ler_csv_em_blocos(arquivo, mapeamento.colunas_usadas, motor, **opcoes):
+        yield from mapear_csv_para_respostas(bloco, mapeamento)
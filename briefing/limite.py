@@ -0,0 +1,149 @@
+import random
+import re
+import threading
+import time
+
+from briefing.metricas import METRICAS
+
+# Códigos HTTP de erros transitórios que valem uma nova tentativa
+CODIGOS_TRANSITORIOS = (429, 500, 502, 503, 504)
+CODIGO_LIMITE_EXCEDIDO = 429
+
+_PADRAO_DICA_ESPERA = re.compile(r"retry (?:in|after) ([\d.]+)\s*s", re.IGNORECASE)
+
+
+# Código HTTP do erro (as exceções de google.api_core expõem `code`)
+def _codigo(erro):
+    codigo = getattr(erro, "code", None)
+    return codigo if isinstance(codigo, int) else None
+
+
+def erro_transitorio(erro):
+    return _codigo(erro) in CODIGOS_TRANSITORIOS or isinstance(erro, (ConnectionError, TimeoutError))
+
+
+# Tempo de espera sugerido pelo servidor, quando houver: RetryInfo nos detalhes
+# do erro, cabeçalho Retry-After ou "retry in Ns" na mensagem
+def dica_espera(erro):
+    for detalhe in getattr(erro, "details", None) or []:
+        atraso = getattr(detalhe, "retry_delay", None)
+        if atraso is not None:
+            return atraso.seconds + atraso.nanos / 1e9
+    resposta = getattr(erro, "response", None)
+    cabecalho = getattr(resposta, "headers", {}).get("Retry-After") if resposta is not None else None
+    if cabecalho:
+        try:
+            return float(cabecalho)
+        except ValueError:
+            pass
+    encontrado = _PADRAO_DICA_ESPERA.search(str(erro))
+    return float(encontrado.group(1)) if encontrado else None
+
+
+# Balde de fichas reabastecido continuamente até `capacidade` por minuto
+class BaldeFichas:
+    def __init__(self, capacidade_por_minuto):
+        self.capacidade = float(capacidade_por_minuto)
+        self.fichas = self.capacidade
+        self._taxa = self.capacidade / 60.0
+        self._atualizado_em = time.monotonic()
+
+    def _reabastecer(self):
+        agora = time.monotonic()
+        self.fichas = min(self.capacidade, self.fichas + (agora - self._atualizado_em) * self._taxa)
+        self._atualizado_em = agora
+
+    # Segundos até haver `quantidade` fichas disponíveis (0 se já houver)
+    def espera(self, quantidade):
+        self._reabastecer()
+        quantidade = min(quantidade, self.capacidade)
+        return 0.0 if self.fichas >= quantidade else (quantidade - self.fichas) / self._taxa
+
+    def consumir(self, quantidade):
+        self._reabastecer()
+        self.fichas -= quantidade
+
+
+# Limitador compartilhado por todas as sessões do processo. Controla requisições
+# e tokens por minuto, repete erros transitórios com espera exponencial com
+# jitter (ou a espera indicada pelo servidor) e reduz pela metade o número de
+# chamadas simultâneas quando a API sinaliza limite excedido (429), voltando a
+# aumentá-lo gradualmente a cada sucesso.
+class LimitadorTaxa:
+    def __init__(self, requisicoes_por_minuto=60, tokens_por_minuto=1_000_000, max_simultaneas=8,
+                 max_tentativas=5, espera_base=1.0, espera_maxima=60.0):
+        self.max_simultaneas = max(1, int(max_simultaneas))
+        self.max_tentativas = max(1, int(max_tentativas))
+        self.espera_base = espera_base
+        self.espera_maxima = espera_maxima
+        self._requisicoes = BaldeFichas(requisicoes_por_minuto)
+        self._tokens = BaldeFichas(tokens_por_minuto)
+        self._limite_simultaneas = float(self.max_simultaneas)
+        self._em_execucao = 0
+        self._condicao = threading.Condition()
+
+    @property
+    def limite_simultaneas(self):
+        return int(self._limite_simultaneas)
+
+    def _adquirir(self, tokens):
+        with self._condicao:
+            while True:
+                if self._em_execucao < int(self._limite_simultaneas):
+                    espera = max(self._requisicoes.espera(1), self._tokens.espera(tokens))
+                    if espera == 0:
+                        self._requisicoes.consumir(1)
+                        self._tokens.consumir(tokens)
+                        self._em_execucao += 1
+                        return
+                    self._condicao.wait(espera)
+                else:
+                    self._condicao.wait()
+
+    def _liberar(self, sucesso=True, limitado=False):
+        with self._condicao:
+            self._em_execucao -= 1
+            if limitado:
+                self._limite_simultaneas = max(1.0, self._limite_simultaneas / 2)
+            elif sucesso:
+                self._limite_simultaneas = min(
+                    float(self.max_simultaneas), self._limite_simultaneas + 1 / self._limite_simultaneas
+                )
+            self._condicao.notify_all()
+
+    # Ajusta o consumo de tokens quando o valor real difere da estimativa
+    def ajustar_tokens(self, diferenca):
+        with self._condicao:
+            self._tokens.consumir(diferenca)
+
+    def _espera_backoff(self, tentativa):
+        return random.uniform(0, min(self.espera_maxima, self.espera_base * 2 ** tentativa))
+
+    # Executa `funcao` respeitando os limites. `tokens_estimados` é reservado antes
+    # da chamada e, se `contar_tokens(resultado)` for informado, a diferença para o
+    # consumo real é ajustada depois.
+    # A vaga de execução é sempre devolvida, mesmo se `funcao` for interrompida
+    # por uma exceção que não derive de Exception (ex.: KeyboardInterrupt).
+    def executar(self, funcao, tokens_estimados=0, contar_tokens=None):
+        for tentativa in range(self.max_tentativas):
+            self._adquirir(tokens_estimados)
+            sucesso = limitado = False
+            try:
+                resultado = funcao()
+                sucesso = True
+            except Exception as e:
+                limitado = _codigo(e) == CODIGO_LIMITE_EXCEDIDO
+                if not erro_transitorio(e) or tentativa == self.max_tentativas - 1:
+                    raise
+                erro = e
+            finally:
+                self._liberar(sucesso=sucesso, limitado=limitado)
+
+            if sucesso:
+                if contar_tokens is not None:
+                    self.ajustar_tokens(contar_tokens(resultado) - tokens_estimados)
+                return resultado
+
+            METRICAS.contar("briefing_novas_tentativas_total", classe=type(erro).__name__)
+            espera = dica_espera(erro)
+            time.sleep(min(espera, self.espera_maxima) if espera is not None else self._espera_backoff(tentativa))
@@ -0,0 +1,169 @@
+import difflib
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+import pandas as pd
+
+from briefing.metricas import METRICAS
+
+TEXTO = "texto"
+SIM_NAO = "sim_nao"
+
+# Respostas que contam como "Sim" nas perguntas de sim/não
+PREFIXOS_SIM = ('sim', 's', 'yes', 'y')
+
+# Similaridade mínima para associar um cabeçalho do CSV a uma pergunta quando
+# o texto não bate exatamente (ex.: pergunta reescrita no Google Forms)
+LIMIAR_SIMILARIDADE = 0.85
+
+# Esquema declarativo: (campo interno, perguntas do formulário, tipo).
+# Campos com mais de uma pergunta juntam as respostas em um único texto.
+ESQUEMA_CSV = [
+    ("nome_empresa", ("Nome da sua empresa/Instituição",), TEXTO),
+    ("nome_responsavel", ("Nome:",), TEXTO),
+    ("cargo_responsavel", ("Cargo:",), TEXTO),
+    ("email_responsavel", ("E-mail:",), TEXTO),
+    ("telefone_responsavel", ("Telefone:",), TEXTO),
+    ("descricao_site", ("Por favor, descreva o site que deseja.",), TEXTO),
+    ("objetivos_principais", ("Quais são os principais objetivos que você deseja alcançar com o site?",), TEXTO),
+    ("objetivos_secundarios", ("Há objetivos secundários que o site deve atingir?",), TEXTO),
+    ("publico_alvo", ("Quem é o público-alvo do seu site?",), TEXTO),
+    ("segmentos_especificos", ("Há algum segmento específico que precisa ser destacado no site?",), TEXTO),
+    ("concorrentes", ("Quem são os seus principais concorrentes?",), TEXTO),
+    ("gosta_concorrentes", ("O que você gosta nos sites dos seus concorrentes?",), TEXTO),
+    ("nao_gosta_concorrentes", ("O que você não gosta nos sites dos seus concorrentes?",), TEXTO),
+    ("diferenciais", ("O que você espera que seu site ofereça de diferente em relação aos concorrentes?",), TEXTO),
+    ("funcionalidades", ("Quais funcionalidades específicas você gostaria de incluir no site?",), TEXTO),
+    ("conteudo_pronto", ("Você já possui todo o conteúdo pronto (textos, imagens, vídeos)?",), SIM_NAO),
+    ("numero_paginas", ("Quantas páginas aproximadamente o site terá?",), TEXTO),
+    ("paginas_desejadas", ("Quais páginas você gostaria de incluir no novo site?",), TEXTO),
+    ("percepcao_visual", ("Como você gostaria que o site fosse visualmente percebido?",), TEXTO),
+    ("referencias_gosta", ("Há algum site ou referência visual que você gosta?",), TEXTO),
+    ("referencias_nao_gosta", ("Há alguma referência visual que você não gosta?",), TEXTO),
+    ("seo", ("O site precisa ser otimizado para SEO?",), SIM_NAO),
+    ("otimizacoes_seo", ("Se sim, gostaria de incluir algum tipo de otimização específica?",), TEXTO),
+    ("mobile_prioritario", ("A versão mobile do site é uma prioridade?",), SIM_NAO),
+    ("ssl", ("Você precisa de algum certificado de segurança SSL para o site?",), SIM_NAO),
+    ("plataforma", ("Você tem alguma preferência de plataforma para o desenvolvimento do site?",), TEXTO),
+    ("hospedagem", ("Você já possui um serviço de hospedagem para o site?",), SIM_NAO),
+    ("uso_dados", ("Você deseja utilizar dados de usuários no seu site (exemplo: cookies, analytics)?",), SIM_NAO),
+    ("banner_cookies", ("Será necessário implementar alguma solução de governança digital, como banner de consentimento para cookies?",), SIM_NAO),
+    ("tagueamento", ("Você precisará de tagueamento de dados para monitoramento de ações no site?",), SIM_NAO),
+    ("tags_especificas", ("Quais tags de conversão ou tracking você precisará integrar?",), TEXTO),
+    ("integracoes", ("Você irá integrar o site com plataformas externas ou APIs?",), SIM_NAO),
+    ("detalhes_integracoes", ("Quais integrações específicas?",), TEXTO),
+    ("prazo", ("Qual a sua expectativa de prazo para o lançamento do novo site?",), TEXTO),
+    ("tem_orcamento", ("Você já tem um orçamento estimado para esse projeto?",), SIM_NAO),
+    ("orcamento", ("Orçamento estimado",), TEXTO),
+    ("manutencao", ("Após o lançamento, você precisará de serviços de manutenção contínuos?",), SIM_NAO),
+    ("consideracoes_finais", (
+        "Há alguma outra necessidade ou exigência que não foi mencionada?",
+        "Alguma consideração adicional sobre o projeto que gostaria de compartilhar conosco?",
+    ), TEXTO),
+]
+
+
+# Remove acentos, pontuação, caixa e espaços extras para comparar cabeçalhos
+def normalizar_cabecalho(texto):
+    texto = unicodedata.normalize("NFKD", str(texto))
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return " ".join(re.sub(r"[^0-9a-z]+", " ", texto.lower()).split())
+
+
+# Resultado da associação entre as perguntas do esquema e as colunas do CSV
+@dataclass
+class MapeamentoColunas:
+    colunas: dict = field(default_factory=dict)  # pergunta -> coluna do CSV
+    por_similaridade: dict = field(default_factory=dict)  # pergunta -> coluna associada de forma aproximada
+    perguntas_sem_coluna: list = field(default_factory=list)
+    colunas_nao_mapeadas: list = field(default_factory=list)
+
+    @property
+    def colunas_usadas(self):
+        return list(dict.fromkeys(self.colunas.values()))
+
+
+# Associa as perguntas do esquema às colunas do CSV. O índice normalizado é
+# construído uma única vez por conjunto de cabeçalhos (ou seja, por arquivo).
+@lru_cache(maxsize=64)
+def mapear_colunas(colunas):
+    indice = {}
+    for coluna in colunas:
+        indice.setdefault(normalizar_cabecalho(coluna), coluna)
+
+    perguntas = [pergunta for _, perguntas, _ in ESQUEMA_CSV for pergunta in perguntas]
+    mapeamento = MapeamentoColunas()
+    disponiveis = dict(indice)
+
+    # Primeiro as correspondências exatas, para que a busca aproximada não
+    # "roube" a coluna de outra pergunta
+    for pergunta in perguntas:
+        chave = normalizar_cabecalho(pergunta)
+        if chave in disponiveis:
+            mapeamento.colunas[pergunta] = disponiveis.pop(chave)
+
+    # Depois a busca aproximada: todos os pares (pergunta, coluna) restantes acima
+    # do limiar são pontuados e atribuídos do mais semelhante para o menos, de
+    # modo que cada coluna fique com a pergunta de que está mais próxima (e não
+    # com a primeira pergunta do esquema que passe do limiar)
+    restantes = [pergunta for pergunta in perguntas if pergunta not in mapeamento.colunas]
+    pares = []
+    comparador = difflib.SequenceMatcher()
+    for ordem_coluna, chave in enumerate(disponiveis):
+        comparador.set_seq2(chave)
+        for ordem_pergunta, pergunta in enumerate(restantes):
+            comparador.set_seq1(normalizar_cabecalho(pergunta))
+            if (comparador.real_quick_ratio() >= LIMIAR_SIMILARIDADE
+                    and comparador.quick_ratio() >= LIMIAR_SIMILARIDADE):
+                pontuacao = comparador.ratio()
+                if pontuacao >= LIMIAR_SIMILARIDADE:
+                    pares.append((-pontuacao, ordem_pergunta, ordem_coluna, pergunta, chave))
+
+    for _, _, _, pergunta, chave in sorted(pares):
+        if pergunta in mapeamento.colunas or chave not in disponiveis:
+            continue
+        coluna = disponiveis.pop(chave)
+        mapeamento.colunas[pergunta] = coluna
+        mapeamento.por_similaridade[pergunta] = coluna
+
+    mapeamento.perguntas_sem_coluna = [pergunta for pergunta in restantes if pergunta not in mapeamento.colunas]
+
+    usadas = set(mapeamento.colunas.values())
+    mapeamento.colunas_nao_mapeadas = [coluna for coluna in colunas if coluna not in usadas]
+    return mapeamento
+
+
+# Converte uma coluna em texto, tratando células vazias/NaN como ""
+def _coluna_como_texto(df, coluna):
+    if coluna is None:
+        return pd.Series("", index=df.index, dtype=object)
+    return df[coluna].fillna("").astype(str).str.strip()
+
+
+# Converte o DataFrame inteiro para o formato interno com operações por coluna
+def mapear_dataframe(df, mapeamento=None):
+    if mapeamento is None:
+        mapeamento = mapear_colunas(tuple(df.columns))
+
+    campos = {}
+    for campo, perguntas, tipo in ESQUEMA_CSV:
+        valores = [_coluna_como_texto(df, mapeamento.colunas.get(pergunta)) for pergunta in perguntas]
+        if tipo == SIM_NAO:
+            sim = valores[0].str.lower().str.startswith(PREFIXOS_SIM)
+            campos[campo] = sim.map({True: "Sim", False: "Não"})
+        elif len(valores) > 1:
+            combinado = valores[0]
+            for valor in valores[1:]:
+                combinado = combinado + "\n\n" + valor
+            campos[campo] = combinado.str.strip()
+        else:
+            campos[campo] = valores[0]
+    return pd.DataFrame(campos, index=df.index)
+
+
+# Função para mapear todas as linhas do CSV (uma resposta do formulário por linha)
+def mapear_csv_para_respostas(df, mapeamento=None):
+    with METRICAS.medir("mapeamento"):
+        return mapear_dataframe(df, mapeamento).to_dict("records")
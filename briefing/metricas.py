@@ -0,0 +1,209 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Limites (em segundos) dos intervalos dos histogramas de duração
+LIMITES_DURACAO = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Preço em dólares por milhão de tokens, para a estimativa de custo (padrão:
+# gemini-1.5-flash com prompts de até 128 mil tokens)
+PRECO_ENTRADA_POR_MILHAO = float(os.getenv("BRIEFING_PRECO_ENTRADA_POR_MILHAO", "0.075"))
+PRECO_SAIDA_POR_MILHAO = float(os.getenv("BRIEFING_PRECO_SAIDA_POR_MILHAO", "0.30"))
+
+TIPO_CONTEUDO_PROMETHEUS = "text/plain; version=0.0.4; charset=utf-8"
+
+_DESCRICOES = {
+    "briefing_etapa_duracao_segundos": ("histogram", "Duração de cada etapa do pipeline de geração"),
+    "briefing_erros_total": ("counter", "Falhas por etapa e classe de erro"),
+    "briefing_novas_tentativas_total": ("counter", "Chamadas ao modelo repetidas após erro transitório"),
+    "briefing_cache_total": ("counter", "Consultas ao cache de briefings por resultado"),
+    "briefing_tokens_total": ("counter", "Tokens consumidos por modelo e tipo"),
+    "briefing_custo_estimado_dolares_total": ("counter", "Custo estimado das chamadas ao modelo, em dólares"),
+}
+
+
+def _escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _rotulos(rotulos):
+    if not rotulos:
+        return ""
+    return "{" + ",".join(f'{nome}="{_escapar(valor)}"' for nome, valor in rotulos) + "}"
+
+
+def _numero(valor):
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+# Histograma com intervalos fixos: custo constante por observação
+class _Histograma:
+    def __init__(self):
+        self.contagens = [0] * (len(LIMITES_DURACAO) + 1)
+        self.soma = 0.0
+        self.total = 0
+        self.minimo = float("inf")
+        self.maximo = 0.0
+
+    def observar(self, valor):
+        self.contagens[bisect_left(LIMITES_DURACAO, valor)] += 1
+        self.soma += valor
+        self.total += 1
+        self.minimo = min(self.minimo, valor)
+        self.maximo = max(self.maximo, valor)
+
+    # Quantil aproximado por interpolação linear dentro do intervalo, limitado
+    # aos valores mínimo e máximo observados
+    def quantil(self, q):
+        if not self.total:
+            return None
+        alvo = q * self.total
+        acumulado = 0
+        for indice, contagem in enumerate(self.contagens):
+            if contagem and acumulado + contagem >= alvo:
+                inferior = max(LIMITES_DURACAO[indice - 1] if indice else 0.0, self.minimo)
+                superior = min(LIMITES_DURACAO[indice] if indice < len(LIMITES_DURACAO) else self.maximo, self.maximo)
+                return inferior + (superior - inferior) * (alvo - acumulado) / contagem
+            acumulado += contagem
+        return self.maximo
+
+
+# Agregador de métricas do processo: histogramas de duração por etapa e
+# contadores (erros, tokens, cache). Cada registro custa um lock e algumas
+# operações em memória, para poder ficar sempre ligado. Com vários workers
+# (uvicorn --workers), cada processo tem o seu agregador.
+class AgregadorMetricas:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histogramas = {}
+        self._contadores = {}
+
+    def observar(self, etapa, segundos):
+        with self._lock:
+            histograma = self._histogramas.get(etapa)
+            if histograma is None:
+                histograma = self._histogramas[etapa] = _Histograma()
+            histograma.observar(segundos)
+
+    def contar(self, nome, quantidade=1, **rotulos):
+        chave = (nome, tuple(sorted(rotulos.items())))
+        with self._lock:
+            self._contadores[chave] = self._contadores.get(chave, 0) + quantidade
+
+    def contar_erro(self, etapa, erro):
+        self.contar("briefing_erros_total", etapa=etapa, classe=type(erro).__name__)
+
+    def contar_tokens(self, modelo, tokens_entrada, tokens_saida):
+        if tokens_entrada:
+            self.contar("briefing_tokens_total", tokens_entrada, modelo=modelo, tipo="entrada")
+        if tokens_saida:
+            self.contar("briefing_tokens_total", tokens_saida, modelo=modelo, tipo="saida")
+        custo = (tokens_entrada * PRECO_ENTRADA_POR_MILHAO + tokens_saida * PRECO_SAIDA_POR_MILHAO) / 1_000_000
+        if custo:
+            self.contar("briefing_custo_estimado_dolares_total", custo, modelo=modelo)
+
+    # Mede a duração do bloco na `etapa`; exceções são contadas pela classe e propagadas
+    @contextmanager
+    def medir(self, etapa):
+        inicio = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.contar_erro(etapa, e)
+            raise
+        finally:
+            self.observar(etapa, time.perf_counter() - inicio)
+
+    # Cópia consistente do estado, para exibição
+    def _copiar(self):
+        with self._lock:
+            histogramas = {
+                etapa: (list(h.contagens), h.soma, h.total, h.quantil(0.5), h.quantil(0.95))
+                for etapa, h in self._histogramas.items()
+            }
+            return histogramas, dict(self._contadores)
+
+    # Resumo para o painel administrativo: por etapa (chamadas, erros, média,
+    # p50 e p95 em ms) e os contadores
+    def resumo(self):
+        histogramas, contadores = self._copiar()
+        erros = {}
+        for (nome, rotulos), valor in contadores.items():
+            if nome == "briefing_erros_total":
+                etapa = dict(rotulos)["etapa"]
+                erros[etapa] = erros.get(etapa, 0) + valor
+        etapas = [
+            {
+                "etapa": etapa,
+                "chamadas": total,
+                "erros": erros.get(etapa, 0),
+                "media_ms": soma / total * 1000 if total else 0.0,
+                "p50_ms": (p50 or 0.0) * 1000,
+                "p95_ms": (p95 or 0.0) * 1000,
+            }
+            for etapa, (_, soma, total, p50, p95) in sorted(histogramas.items())
+        ]
+        return {
+            "etapas": etapas,
+            "contadores": [
+                {"metrica": nome, **dict(rotulos), "valor": valor}
+                for (nome, rotulos), valor in sorted(contadores.items())
+            ],
+        }
+
+    # Métricas no formato de texto do Prometheus
+    def texto_prometheus(self):
+        histogramas, contadores = self._copiar()
+        linhas = []
+        nome = "briefing_etapa_duracao_segundos"
+        tipo, descricao = _DESCRICOES[nome]
+        linhas += [f"# HELP {nome} {descricao}", f"# TYPE {nome} {tipo}"]
+        for etapa, (contagens, soma, total, _, _) in sorted(histogramas.items()):
+            acumulado = 0
+            for limite, contagem in zip(LIMITES_DURACAO + (float("inf"),), contagens):
+                acumulado += contagem
+                le = "+Inf" if limite == float("inf") else repr(limite)
+                linhas.append(f"{nome}_bucket{_rotulos((('etapa', etapa), ('le', le)))} {acumulado}")
+            linhas.append(f"{nome}_sum{_rotulos((('etapa', etapa),))} {_numero(soma)}")
+            linhas.append(f"{nome}_count{_rotulos((('etapa', etapa),))} {total}")
+
+        por_nome = {}
+        for (nome, rotulos), valor in sorted(contadores.items()):
+            por_nome.setdefault(nome, []).append((rotulos, valor))
+        for nome, valores in por_nome.items():
+            tipo, descricao = _DESCRICOES.get(nome, ("counter", nome))
+            linhas += [f"# HELP {nome} {descricao}", f"# TYPE {nome} {tipo}"]
+            linhas += [f"{nome}{_rotulos(rotulos)} {_numero(valor)}" for rotulos, valor in valores]
+        return "\n".join(linhas) + "\n"
+
+
+# Agregador compartilhado pelo processo (motor, leitura do CSV, app e API)
+METRICAS = AgregadorMetricas()
+
+
+# Servidor HTTP mínimo que expõe /metrics em uma thread, para processos sem API
+# própria (ex.: o Streamlit)
+def servir_metricas(porta, host="0.0.0.0", agregador=METRICAS):
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Manipulador(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            corpo = agregador.texto_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", TIPO_CONTEUDO_PROMETHEUS)
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def log_message(self, formato, *argumentos):
+            pass
+
+    servidor = ThreadingHTTPServer((host, porta), Manipulador)
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, name="servidor-metricas", daemon=True).start()
+    return servidor
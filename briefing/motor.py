@@ -0,0 +1,235 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from briefing.backends import backend_do_ambiente
+from briefing.cache import CacheBriefing, calcular_chave
+from briefing.historico import HistoricoBriefings
+from briefing.limite import LimitadorTaxa
+from briefing.metricas import METRICAS
+from briefing.prompt import MAX_TOKENS_CAMPO, MAX_TOKENS_PROMPT, PROMPT_VERSAO, estimar_tokens, montar_prompt
+from briefing.secoes import gerar_briefing_por_secoes, separar_secoes
+
+
+# Resultado padrão de uma geração
+def resultado_geracao(briefing, do_cache, tokens_prompt_estimados=0, tokens_entrada=0, tokens_saida=0,
+                      tempo_primeiro_trecho=None):
+    return {
+        "briefing": briefing,
+        "do_cache": do_cache,
+        "tokens_prompt_estimados": tokens_prompt_estimados,
+        "tokens_entrada": tokens_entrada,
+        "tokens_saida": tokens_saida,
+        "tempo_primeiro_trecho": tempo_primeiro_trecho,
+    }
+
+
+# Geração em andamento com streaming. Iterar `trechos()` devolve o texto à medida
+# que chega do modelo (ou o briefing inteiro, se veio do cache); depois disso,
+# `resultado()` traz o briefing completo e os tokens consumidos. O tempo até o
+# primeiro trecho e o total da chamada vão para as métricas.
+class Transmissao:
+    def __init__(self, motor, chave, respostas, prompt=None, briefing=None):
+        self.do_cache = briefing is not None
+        self.tokens_prompt_estimados = 0 if prompt is None else estimar_tokens(prompt)
+        self.tempo_primeiro_trecho = None
+        self._motor = motor
+        self._chave = chave
+        self._respostas = respostas
+        self._prompt = prompt
+        self._briefing = briefing
+        self._resposta = None
+        self._inicio = time.perf_counter()
+
+    def trechos(self):
+        if self.do_cache:
+            self.tempo_primeiro_trecho = time.perf_counter() - self._inicio
+            yield self._briefing
+            METRICAS.observar("geracao", time.perf_counter() - self._inicio)
+            self._motor.registrar(self._chave, self._respostas, self.resultado(), inicio=self._inicio)
+            return
+
+        inicio_chamada = time.perf_counter()
+        partes = []
+        try:
+            self._resposta = self._motor.chamar_modelo(self._prompt, stream=True)
+            for trecho in self._resposta:
+                if self.tempo_primeiro_trecho is None:
+                    self.tempo_primeiro_trecho = time.perf_counter() - self._inicio
+                    METRICAS.observar("modelo_primeiro_trecho", time.perf_counter() - inicio_chamada)
+                partes.append(trecho)
+                yield trecho
+        except Exception as e:
+            METRICAS.contar_erro("modelo", e)
+            raise
+        METRICAS.observar("modelo", time.perf_counter() - inicio_chamada)
+        METRICAS.contar_tokens(self._motor.modelo, self._resposta.tokens_entrada, self._resposta.tokens_saida)
+        self._briefing = "".join(partes)
+        self._motor.cache.salvar(self._chave, self._briefing)
+        METRICAS.observar("geracao", time.perf_counter() - self._inicio)
+        self._motor.registrar(self._chave, self._respostas, self.resultado(), inicio=self._inicio)
+
+    def resultado(self):
+        tokens_entrada = self._resposta.tokens_entrada if self._resposta else 0
+        tokens_saida = self._resposta.tokens_saida if self._resposta else 0
+        return resultado_geracao(
+            self._briefing, self.do_cache, self.tokens_prompt_estimados, tokens_entrada, tokens_saida,
+            self.tempo_primeiro_trecho
+        )
+
+
+# Motor de geração de briefings, sem dependência de interface. Reúne o backend
+# da LLM (ver briefing.backends), cache persistente, limitador de taxa, montagem
+# do prompt e, opcionalmente, o histórico de briefings gerados; é compartilhado
+# entre threads e sessões do mesmo processo.
+class MotorBriefing:
+    def __init__(self, cache, limitador, backend, max_tokens_prompt=MAX_TOKENS_PROMPT,
+                 max_tokens_campo=MAX_TOKENS_CAMPO, max_simultaneas_secoes=4, historico=None):
+        self.cache = cache
+        self.limitador = limitador
+        self.backend = backend
+        self.historico = historico
+        self.max_tokens_prompt = max_tokens_prompt
+        self.max_tokens_campo = max_tokens_campo
+        self.max_simultaneas_secoes = max_simultaneas_secoes
+
+    # Nome do modelo, usado na chave de cache e na interface
+    @property
+    def modelo(self):
+        return self.backend.nome
+
+    # Configuração a partir das variáveis de ambiente
+    @classmethod
+    def do_ambiente(cls):
+        cache = CacheBriefing(
+            os.getenv("BRIEFING_CACHE_CAMINHO", "briefings_cache.db"),
+            ttl_segundos=float(os.getenv("BRIEFING_CACHE_TTL_HORAS", "168")) * 3600,
+            max_entradas=int(os.getenv("BRIEFING_CACHE_MAX_ENTRADAS", "1000")),
+            max_bytes=int(float(os.getenv("BRIEFING_CACHE_MAX_MB", "100")) * 1024 * 1024),
+        )
+        limitador = LimitadorTaxa(
+            requisicoes_por_minuto=float(os.getenv("BRIEFING_LIMITE_RPM", "60")),
+            tokens_por_minuto=float(os.getenv("BRIEFING_LIMITE_TPM", "1000000")),
+            max_simultaneas=int(os.getenv("BRIEFING_LIMITE_SIMULTANEAS", "8")),
+            max_tentativas=int(os.getenv("BRIEFING_LIMITE_TENTATIVAS", "5")),
+        )
+        return cls(
+            cache,
+            limitador,
+            backend_do_ambiente(),
+            max_tokens_prompt=int(os.getenv("BRIEFING_PROMPT_MAX_TOKENS", str(MAX_TOKENS_PROMPT))),
+            max_tokens_campo=int(os.getenv("BRIEFING_PROMPT_MAX_TOKENS_CAMPO", str(MAX_TOKENS_CAMPO))),
+            max_simultaneas_secoes=int(os.getenv("BRIEFING_MAX_SIMULTANEAS_SECOES", "4")),
+            historico=HistoricoBriefings(os.getenv("BRIEFING_HISTORICO_CAMINHO", "briefings_historico.db")),
+        )
+
+    # Chave de cache do briefing; inclui o orçamento de tokens, que altera o prompt,
+    # e o modo de geração, que altera o documento
+    def chave(self, respostas, por_secoes=False):
+        versao = f"{PROMPT_VERSAO}/{self.max_tokens_prompt}/{self.max_tokens_campo}" + ("/secoes" if por_secoes else "")
+        return calcular_chave(respostas, versao, self.modelo)
+
+    def montar_prompt(self, respostas):
+        with METRICAS.medir("prompt"):
+            return montar_prompt(respostas, self.max_tokens_prompt, self.max_tokens_campo)
+
+    # Guarda o resultado no histórico, se houver um configurado
+    def registrar(self, chave, respostas, resultado, por_secoes=False, inicio=None):
+        if self.historico is None:
+            return
+        duracao = None if inicio is None else time.perf_counter() - inicio
+        self.historico.registrar(chave, respostas, resultado, self.modelo, por_secoes, duracao)
+
+    # Chama o modelo através do limitador de taxa, com novas tentativas em erros
+    # transitórios. Em streaming, só o início da resposta passa pelo limitador (e
+    # as métricas da chamada ficam com a Transmissao).
+    def chamar_modelo(self, prompt, stream=False):
+        if stream:
+            return self.limitador.executar(lambda: self.backend.transmitir(prompt), estimar_tokens(prompt))
+        with METRICAS.medir("modelo"):
+            resposta = self.limitador.executar(
+                lambda: self.backend.gerar(prompt),
+                tokens_estimados=estimar_tokens(prompt),
+                contar_tokens=lambda resposta: resposta.tokens_entrada + resposta.tokens_saida,
+            )
+        METRICAS.contar_tokens(self.modelo, resposta.tokens_entrada, resposta.tokens_saida)
+        return resposta
+
+    # Gera as seções redigidas em chamadas paralelas e as demais localmente. Com
+    # `anterior` (resultado de uma geração por seções, com "respostas" e "secoes"),
+    # só as seções afetadas pelos campos alterados voltam ao modelo.
+    def _gerar_por_secoes(self, respostas, anterior=None):
+        def gerar(prompt):
+            resposta = self.chamar_modelo(prompt)
+            return resposta.texto, resposta.tokens_entrada, resposta.tokens_saida
+
+        anterior = anterior or {}
+        resultado = gerar_briefing_por_secoes(
+            respostas, gerar, self.max_simultaneas_secoes, self.max_tokens_campo,
+            respostas_anteriores=anterior.get("respostas"), secoes_anteriores=anterior.get("secoes"),
+        )
+        resultado.update(do_cache=False, tempo_primeiro_trecho=None)
+        return resultado
+
+    # Gera um briefing e propaga exceções. Retorna o resultado da geração,
+    # indicando se o briefing veio do cache. No modo por seções, `anterior`
+    # permite regerar apenas o que mudou (ver _gerar_por_secoes).
+    def gerar(self, respostas, usar_cache=True, por_secoes=False, anterior=None):
+        inicio = time.perf_counter()
+        chave = self.chave(respostas, por_secoes)
+        resultado = None
+        if usar_cache:
+            briefing = self.cache.obter(chave)
+            METRICAS.contar("briefing_cache_total", resultado="falha" if briefing is None else "acerto")
+            if briefing is not None:
+                resultado = resultado_geracao(briefing, True)
+                if por_secoes:
+                    resultado["secoes"] = separar_secoes(briefing)
+
+        if resultado is None and por_secoes:
+            resultado = self._gerar_por_secoes(respostas, anterior)
+            self.cache.salvar(chave, resultado["briefing"])
+        elif resultado is None:
+            prompt = self.montar_prompt(respostas)
+            resposta = self.chamar_modelo(prompt)
+            self.cache.salvar(chave, resposta.texto)
+            resultado = resultado_geracao(
+                resposta.texto, False, estimar_tokens(prompt), resposta.tokens_entrada, resposta.tokens_saida
+            )
+
+        METRICAS.observar("geracao", time.perf_counter() - inicio)
+        self.registrar(chave, respostas, resultado, por_secoes, inicio)
+        return resultado
+
+    # Prepara uma geração com streaming (consultando o cache antes)
+    def transmitir(self, respostas, usar_cache=True):
+        chave = self.chave(respostas)
+        if usar_cache:
+            briefing = self.cache.obter(chave)
+            METRICAS.contar("briefing_cache_total", resultado="falha" if briefing is None else "acerto")
+            if briefing is not None:
+                return Transmissao(self, chave, respostas, briefing=briefing)
+        return Transmissao(self, chave, respostas, prompt=self.montar_prompt(respostas))
+
+    # Gera vários briefings em paralelo com limite de chamadas simultâneas.
+    # `ao_concluir(indice, resultado)` é chamado na thread de quem chamou a cada
+    # item finalizado; falhas são registradas em resultado["erro"].
+    def gerar_em_lote(self, lista_respostas, max_simultaneas=4, ao_concluir=None, usar_cache=True, por_secoes=False):
+        resultados = [None] * len(lista_respostas)
+        if not lista_respostas:
+            return resultados
+        with ThreadPoolExecutor(max_workers=max(1, int(max_simultaneas))) as executor:
+            futuros = {
+                executor.submit(self.gerar, respostas, usar_cache, por_secoes): indice
+                for indice, respostas in enumerate(lista_respostas)
+            }
+            for futuro in as_completed(futuros):
+                indice = futuros[futuro]
+                try:
+                    resultados[indice] = futuro.result()
+                    resultados[indice]["erro"] = None
+                except Exception as e:
+                    resultados[indice] = {"briefing": None, "do_cache": False, "erro": str(e)}
+                if ao_concluir:
+                    ao_concluir(indice, resultados[indice])
+        return resultados
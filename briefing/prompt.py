@@ -0,0 +1,218 @@
+from briefing.cache import normalizar_respostas
+
+# Incrementar sempre que o texto do prompt mudar, para invalidar o cache
+PROMPT_VERSAO = "4"
+
+# Orçamento padrão de tokens do prompt inteiro e de cada resposta em texto livre
+MAX_TOKENS_PROMPT = 3000
+MAX_TOKENS_CAMPO = 400
+# Limite de cada resposta curta (nome, contato, prazo, orçamento...)
+MAX_TOKENS_CAMPO_CURTO = 50
+
+# Média de caracteres por token usada na estimativa local (texto em português)
+CARACTERES_POR_TOKEN = 4
+
+# Campos do formulário que compõem as respostas
+CAMPOS_RESPOSTAS = (
+    "nome_empresa", "nome_responsavel", "cargo_responsavel", "email_responsavel", "telefone_responsavel",
+    "descricao_site", "objetivos_principais", "objetivos_secundarios", "publico_alvo", "segmentos_especificos",
+    "concorrentes", "gosta_concorrentes", "nao_gosta_concorrentes", "diferenciais", "funcionalidades",
+    "conteudo_pronto", "numero_paginas", "paginas_desejadas", "percepcao_visual", "referencias_gosta",
+    "referencias_nao_gosta", "seo", "otimizacoes_seo", "mobile_prioritario", "ssl", "plataforma", "hospedagem",
+    "uso_dados", "banner_cookies", "tagueamento", "tags_especificas", "integracoes", "detalhes_integracoes",
+    "prazo", "tem_orcamento", "orcamento", "manutencao", "consideracoes_finais",
+)
+
+# Respostas em texto livre, que podem ser truncadas para caber no orçamento
+CAMPOS_TEXTO_LIVRE = (
+    "descricao_site", "objetivos_principais", "objetivos_secundarios", "publico_alvo",
+    "segmentos_especificos", "concorrentes", "gosta_concorrentes", "nao_gosta_concorrentes",
+    "diferenciais", "funcionalidades", "paginas_desejadas", "percepcao_visual",
+    "referencias_gosta", "referencias_nao_gosta", "otimizacoes_seo", "plataforma",
+    "tags_especificas", "detalhes_integracoes", "consideracoes_finais",
+)
+
+# Respostas curtas em texto (as de Sim/Não viram textos fixos no prompt)
+CAMPOS_TEXTO_CURTO = (
+    "nome_empresa", "nome_responsavel", "cargo_responsavel", "email_responsavel", "telefone_responsavel",
+    "numero_paginas", "prazo", "orcamento",
+)
+
+_SUFIXO_TRUNCADO = " […]"
+
+INTRODUCAO = (
+    "Com base nas seguintes respostas do cliente, gere um briefing profissional e detalhado "
+    "para desenvolvimento de um site institucional/empresarial. Organize em seções claras "
+    "com títulos destacados e mantenha um tom profissional. Itens omitidos não foram "
+    "informados pelo cliente."
+)
+
+INSTRUCOES_FORMATO = (
+    "Formate o briefing como um documento profissional com: 1. seções claramente destacadas; "
+    "2. listas com marcadores; 3. destaque para informações críticas; 4. linguagem técnica "
+    "apropriada para desenvolvimento web; 5. resumo executivo no início com os pontos mais importantes."
+)
+
+
+# Estimativa local do número de tokens, sem chamada à API
+def estimar_tokens(texto):
+    return -(-len(texto) // CARACTERES_POR_TOKEN)
+
+
+# Corta o texto para caber em `max_tokens` (contando a marca de corte),
+# preferencialmente entre palavras
+def truncar(texto, max_tokens):
+    if estimar_tokens(texto) <= max_tokens:
+        return texto
+    limite = max(0, max_tokens * CARACTERES_POR_TOKEN - len(_SUFIXO_TRUNCADO))
+    cortado = texto[:limite]
+    if " " in cortado:
+        cortado = cortado.rsplit(" ", 1)[0]
+    return cortado + _SUFIXO_TRUNCADO
+
+
+def _juntar(separador, *partes):
+    return separador.join(parte for parte in partes if parte)
+
+
+def _sim(respostas, campo):
+    return respostas.get(campo) == "Sim"
+
+
+# Seções do briefing como (título, [(rótulo, valor), ...]). Itens sem valor são
+# descartados na montagem e seções sem nenhum item são omitidas.
+def secoes_briefing(respostas):
+    r = respostas
+    responsavel = r["nome_responsavel"] + (f" ({r['cargo_responsavel']})" if r["cargo_responsavel"] else "")
+    return [
+        ("Informações Básicas", [
+            ("Empresa", r["nome_empresa"]),
+            ("Responsável", responsavel),
+            ("Contato", _juntar(" | ", r["email_responsavel"], r["telefone_responsavel"])),
+        ]),
+        ("Descrição do Projeto", [
+            ("O cliente deseja", r["descricao_site"]),
+        ]),
+        ("Objetivos", [
+            ("Principais objetivos", r["objetivos_principais"]),
+            ("Objetivos secundários", r["objetivos_secundarios"]),
+        ]),
+        ("Público-Alvo", [
+            ("Público-alvo", r["publico_alvo"]),
+            ("Segmentos específicos", r["segmentos_especificos"]),
+        ]),
+        ("Análise Competitiva", [
+            ("Concorrentes mencionados", r["concorrentes"]),
+            ("Pontos positivos observados nos concorrentes", r["gosta_concorrentes"]),
+            ("Pontos negativos observados nos concorrentes", r["nao_gosta_concorrentes"]),
+            ("Diferenciais desejados", r["diferenciais"]),
+        ]),
+        ("Requisitos Técnicos e Funcionalidades", [
+            ("Funcionalidades solicitadas", r["funcionalidades"]),
+            ("Conteúdo disponível", "Sim, o cliente já possui todo o conteúdo" if _sim(r, "conteudo_pronto") else "Não, será necessário criar conteúdo"),
+            ("Número estimado de páginas", r["numero_paginas"]),
+            ("Páginas solicitadas", r["paginas_desejadas"]),
+        ]),
+        ("Design e Identidade Visual", [
+            ("Percepção visual desejada", r["percepcao_visual"]),
+            ("Referências que gosta", r["referencias_gosta"]),
+            ("Referências que não gosta", r["referencias_nao_gosta"]),
+        ]),
+        ("SEO e Performance", [
+            ("Necessidade de SEO", "Sim" if _sim(r, "seo") else "Não"),
+            ("Otimizações específicas solicitadas", r["otimizacoes_seo"] if _sim(r, "seo") else ""),
+            ("Prioridade mobile", "Alta" if _sim(r, "mobile_prioritario") else "Não especificada"),
+            ("Certificado SSL", "Necessário" if _sim(r, "ssl") else "Não solicitado"),
+        ]),
+        ("Plataforma e Hospedagem", [
+            ("Plataforma preferida", r["plataforma"]),
+            ("Hospedagem", "Já possui" if _sim(r, "hospedagem") else "Necessária"),
+        ]),
+        ("Governança Digital", [
+            ("Uso de dados", "Sim" if _sim(r, "uso_dados") else "Não"),
+            ("Banner de consentimento", "Necessário" if _sim(r, "banner_cookies") else "Não necessário"),
+            ("Tagueamento", "Sim" if _sim(r, "tagueamento") else "Não"),
+            ("Tags específicas", r["tags_especificas"] if _sim(r, "tagueamento") else ""),
+        ]),
+        ("Integrações", [
+            ("Integrações necessárias", "Sim" if _sim(r, "integracoes") else "Não"),
+            ("Detalhes das integrações", r["detalhes_integracoes"] if _sim(r, "integracoes") else ""),
+        ]),
+        ("Cronograma e Orçamento", [
+            ("Prazo desejado", r["prazo"]),
+            ("Orçamento estimado", r["orcamento"] if _sim(r, "tem_orcamento") else ""),
+            ("Manutenção pós-lançamento", "Necessária" if _sim(r, "manutencao") else "Não solicitada"),
+        ]),
+        ("Considerações Adicionais", [
+            ("Considerações", r["consideracoes_finais"]),
+        ]),
+    ]
+
+
+# Renderiza as seções em Markdown compacto, numerando apenas as que têm conteúdo
+def renderizar_secoes(secoes, numero_inicial=1):
+    blocos = []
+    numero = numero_inicial
+    for titulo, itens in secoes:
+        linhas = [f"- {rotulo}: {valor}" for rotulo, valor in itens if valor]
+        if linhas:
+            blocos.append(f"## {numero}. {titulo}\n" + "\n".join(linhas))
+            numero += 1
+    return "\n\n".join(blocos)
+
+
+def _montar(respostas):
+    return "\n\n".join([
+        INTRODUCAO,
+        f"# Briefing para Desenvolvimento de Site - {respostas['nome_empresa']}",
+        renderizar_secoes(secoes_briefing(respostas)),
+        INSTRUCOES_FORMATO,
+    ])
+
+
+# Maior limite por campo que faz a soma dos campos livres caber em `disponivel`
+def _limite_por_campo(tamanhos, disponivel):
+    restantes = sorted(tamanhos)
+    while restantes:
+        limite = disponivel // len(restantes)
+        if restantes[0] > limite:
+            return max(limite, 1)
+        disponivel -= restantes.pop(0)
+    return None
+
+
+# Normaliza as respostas (campos ausentes ficam vazios) e limita cada resposta em
+# texto livre a `max_tokens_campo` e cada resposta curta a MAX_TOKENS_CAMPO_CURTO
+def preparar_respostas(respostas, max_tokens_campo=MAX_TOKENS_CAMPO):
+    respostas = {**dict.fromkeys(CAMPOS_RESPOSTAS, ""), **normalizar_respostas(respostas)}
+    for campo in CAMPOS_TEXTO_LIVRE:
+        respostas[campo] = truncar(respostas[campo], max_tokens_campo)
+    for campo in CAMPOS_TEXTO_CURTO:
+        respostas[campo] = truncar(respostas[campo], min(MAX_TOKENS_CAMPO_CURTO, max_tokens_campo))
+    return respostas
+
+
+# Monta o prompt sem espaços supérfluos nem seções vazias, limitando cada resposta
+# a `max_tokens_campo` (ou MAX_TOKENS_CAMPO_CURTO) e o prompt inteiro a
+# `max_tokens`, desde que o texto fixo do prompt caiba nesse orçamento
+def montar_prompt(respostas, max_tokens=MAX_TOKENS_PROMPT, max_tokens_campo=MAX_TOKENS_CAMPO):
+    respostas = preparar_respostas(respostas, max_tokens_campo)
+    prompt = _montar(respostas)
+    excedente = estimar_tokens(prompt) - max_tokens
+
+    # Reduz primeiro as respostas mais longas até o prompt caber no orçamento. A
+    # estimativa é arredondada por campo, então repete enquanto houver excedente
+    # e alguma resposta ainda puder ser cortada.
+    while excedente > 0:
+        tamanhos = {
+            campo: estimar_tokens(respostas[campo])
+            for campo in CAMPOS_TEXTO_LIVRE + CAMPOS_TEXTO_CURTO if respostas[campo]
+        }
+        limite = _limite_por_campo(list(tamanhos.values()), sum(tamanhos.values()) - excedente)
+        cortadas = {campo: truncar(respostas[campo], limite) for campo in tamanhos} if limite else {}
+        if all(cortadas[campo] == respostas[campo] for campo in cortadas):
+            break
+        respostas.update(cortadas)
+        prompt = _montar(respostas)
+        excedente = estimar_tokens(prompt) - max_tokens
+    return prompt
@@ -0,0 +1,169 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from briefing.metricas import METRICAS
+from briefing.prompt import MAX_TOKENS_CAMPO, estimar_tokens, preparar_respostas, renderizar_secoes, secoes_briefing
+
+# Campos do formulário usados em cada seção de dados de secoes_briefing()
+CAMPOS_SECAO = {
+    "Informações Básicas": ("nome_empresa", "nome_responsavel", "cargo_responsavel", "email_responsavel", "telefone_responsavel"),
+    "Descrição do Projeto": ("descricao_site",),
+    "Objetivos": ("objetivos_principais", "objetivos_secundarios"),
+    "Público-Alvo": ("publico_alvo", "segmentos_especificos"),
+    "Análise Competitiva": ("concorrentes", "gosta_concorrentes", "nao_gosta_concorrentes", "diferenciais"),
+    "Requisitos Técnicos e Funcionalidades": ("funcionalidades", "conteudo_pronto", "numero_paginas", "paginas_desejadas"),
+    "Design e Identidade Visual": ("percepcao_visual", "referencias_gosta", "referencias_nao_gosta"),
+    "SEO e Performance": ("seo", "otimizacoes_seo", "mobile_prioritario", "ssl"),
+    "Plataforma e Hospedagem": ("plataforma", "hospedagem"),
+    "Governança Digital": ("uso_dados", "banner_cookies", "tagueamento", "tags_especificas"),
+    "Integrações": ("integracoes", "detalhes_integracoes"),
+    "Cronograma e Orçamento": ("prazo", "tem_orcamento", "orcamento", "manutencao"),
+    "Considerações Adicionais": ("consideracoes_finais",),
+}
+
+
+# Seção do documento final. Seções com `instrucao` são redigidas pela LLM a
+# partir das seções de dados listadas em `contexto`; as demais são renderizadas
+# localmente a partir das respostas.
+@dataclass(frozen=True)
+class Secao:
+    chave: str
+    titulo: str
+    contexto: tuple = ()
+    instrucao: str = ""
+
+    @property
+    def gerada(self):
+        return bool(self.instrucao)
+
+    # Campos do formulário dos quais o texto da seção depende
+    @property
+    def campos(self):
+        titulos = self.contexto if self.gerada else (self.titulo,)
+        campos = ["nome_empresa"] if self.gerada else []
+        for titulo in titulos:
+            campos.extend(CAMPOS_SECAO[titulo])
+        return tuple(dict.fromkeys(campos))
+
+
+SECOES = [
+    # Dados de contato não entram no resumo, para que correções neles não exijam
+    # uma nova chamada ao modelo
+    Secao("resumo", "Resumo Executivo", tuple(titulo for titulo in CAMPOS_SECAO if titulo != "Informações Básicas"),
+          "Escreva um resumo executivo de até 150 palavras destacando os pontos mais importantes do projeto, "
+          "incluindo prazo, requisitos críticos e riscos."),
+    Secao("informacoes_basicas", "1. Informações Básicas"),
+    Secao("descricao", "2. Descrição do Projeto"),
+    Secao("objetivos", "3. Objetivos", ("Descrição do Projeto", "Objetivos", "Público-Alvo"),
+          "Organize os objetivos principais e secundários do site e relacione cada um a resultados mensuráveis."),
+    Secao("publico_alvo", "4. Público-Alvo"),
+    Secao("analise_competitiva", "5. Análise Competitiva", ("Descrição do Projeto", "Análise Competitiva"),
+          "Analise os concorrentes citados, os pontos positivos e negativos observados e como os diferenciais "
+          "desejados posicionam o site."),
+    Secao("requisitos", "6. Requisitos Técnicos e Funcionalidades"),
+    Secao("design", "7. Design e Identidade Visual", ("Descrição do Projeto", "Público-Alvo", "Design e Identidade Visual"),
+          "Traduza a percepção visual desejada e as referências em diretrizes de design (tom, tipografia, cores, layout)."),
+    Secao("seo", "8. SEO e Performance"),
+    Secao("plataforma", "9. Plataforma e Hospedagem"),
+    Secao("governanca", "10. Governança Digital"),
+    Secao("integracoes", "11. Integrações"),
+    Secao("cronograma", "12. Cronograma e Orçamento"),
+    Secao("consideracoes", "13. Considerações Adicionais"),
+]
+
+
+def _titulo_sem_numero(titulo):
+    return titulo.split(". ", 1)[-1]
+
+
+# Renderiza localmente (sem LLM) uma seção de dados
+def renderizar_secao_local(secao, respostas):
+    itens = dict(secoes_briefing(respostas))[_titulo_sem_numero(secao.titulo)]
+    linhas = [f"- **{rotulo}:** {valor}" for rotulo, valor in itens if valor]
+    return f"## {secao.titulo}\n" + ("\n".join(linhas) if linhas else "- Não informado")
+
+
+# Prompt de uma seção redigida pela LLM, contendo apenas os dados de que ela precisa
+def montar_prompt_secao(secao, respostas):
+    dados = [(titulo, itens) for titulo, itens in secoes_briefing(respostas) if titulo in secao.contexto]
+    return "\n\n".join([
+        f"Você está redigindo a seção \"{_titulo_sem_numero(secao.titulo)}\" de um briefing profissional para "
+        f"o desenvolvimento do site da empresa {respostas['nome_empresa']}. {secao.instrucao} "
+        "Responda apenas com o conteúdo da seção em Markdown, sem repetir o título, usando listas com "
+        "marcadores e linguagem técnica apropriada para desenvolvimento web. Itens omitidos não foram "
+        "informados pelo cliente.",
+        "Dados do cliente:",
+        renderizar_secoes(dados),
+    ])
+
+
+# Junta as seções na ordem do documento
+def montar_documento(respostas, textos_secoes):
+    partes = [f"# Briefing para Desenvolvimento de Site - {respostas['nome_empresa']}"]
+    partes.extend(textos_secoes[secao.chave] for secao in SECOES)
+    return "\n\n".join(partes)
+
+
+# Separa um documento montado por montar_documento() nos textos de cada seção.
+# Retorna None se algum título não for encontrado (ex.: documento de outro modo).
+def separar_secoes(briefing):
+    posicoes = []
+    inicio = 0
+    for secao in SECOES:
+        posicao = briefing.find(f"\n\n## {secao.titulo}\n", inicio)
+        if posicao < 0:
+            return None
+        posicoes.append(posicao + 2)
+        inicio = posicao + 2
+    fins = [posicao - 2 for posicao in posicoes[1:]] + [len(briefing)]
+    return {secao.chave: briefing[posicao:fim] for secao, posicao, fim in zip(SECOES, posicoes, fins)}
+
+
+# Campos cujo valor, depois de normalizado e truncado como no prompt, mudou
+# entre duas versões das respostas
+def campos_alterados(anteriores, respostas, max_tokens_campo=MAX_TOKENS_CAMPO):
+    anteriores = preparar_respostas(anteriores, max_tokens_campo)
+    respostas = preparar_respostas(respostas, max_tokens_campo)
+    return {campo for campo, valor in respostas.items() if anteriores.get(campo) != valor}
+
+
+# Gera o briefing por seções: as seções de dados são renderizadas localmente e
+# as seções redigidas são pedidas à LLM em chamadas independentes e simultâneas.
+# `gerar(prompt)` deve retornar (texto, tokens_entrada, tokens_saida).
+# Com `respostas_anteriores` e `secoes_anteriores` (de uma geração anterior), as
+# seções redigidas que não dependem de nenhum campo alterado são reaproveitadas.
+def gerar_briefing_por_secoes(respostas, gerar, max_simultaneas=4, max_tokens_campo=MAX_TOKENS_CAMPO,
+                              respostas_anteriores=None, secoes_anteriores=None):
+    alterados = None
+    if respostas_anteriores is not None and secoes_anteriores:
+        alterados = campos_alterados(respostas_anteriores, respostas, max_tokens_campo)
+    respostas = preparar_respostas(respostas, max_tokens_campo)
+    textos = {}
+    pendentes = {}
+    reaproveitadas = []
+    with METRICAS.medir("prompt"):
+        for secao in SECOES:
+            if not secao.gerada:
+                textos[secao.chave] = renderizar_secao_local(secao, respostas)
+            elif alterados is not None and secao.chave in secoes_anteriores and not alterados.intersection(secao.campos):
+                textos[secao.chave] = secoes_anteriores[secao.chave]
+                reaproveitadas.append(secao.chave)
+            else:
+                pendentes[secao.chave] = (secao, montar_prompt_secao(secao, respostas))
+
+    resultado = {"tokens_prompt_estimados": 0, "tokens_entrada": 0, "tokens_saida": 0,
+                 "secoes_reaproveitadas": reaproveitadas}
+    if pendentes:
+        with ThreadPoolExecutor(max_workers=max(1, min(int(max_simultaneas), len(pendentes)))) as executor:
+            futuros = {chave: executor.submit(gerar, prompt) for chave, (_, prompt) in pendentes.items()}
+            for chave, futuro in futuros.items():
+                secao, prompt = pendentes[chave]
+                texto, tokens_entrada, tokens_saida = futuro.result()
+                textos[chave] = f"## {secao.titulo}\n{texto.strip()}"
+                resultado["tokens_prompt_estimados"] += estimar_tokens(prompt)
+                resultado["tokens_entrada"] += tokens_entrada
+                resultado["tokens_saida"] += tokens_saida
+
+    resultado["secoes"] = textos
+    resultado["briefing"] = montar_documento(respostas, textos)
+    return resultado
@@ -3,10 +3,13 @@ import sys
 sys.modules['sqlite3'] = sys.modules.pop('pysqlite3')
 import os
 import streamlit as st
-import google.generativeai as genai
 from datetime import datetime
-import pandas as pd
 import io
+import time
+import hashlib
+from briefing.historico import TAMANHO_PAGINA, cursor_pagina
+from briefing.metricas import METRICAS, servir_metricas
+from briefing.motor import MotorBriefing
 
 # Configuração da página
 st.set_page_config(
@@ -15,10 +18,32 @@ st.set_page_config(
     layout="wide"
 )
 
-# Configuração do Gemini
-gemini_api_key = os.getenv("GEM_API_KEY")
-genai.configure(api_key=gemini_api_key)
-model = genai.GenerativeModel('gemini-1.5-flash')
+# Motor de geração (cliente do Gemini, cache persistente e limitador de taxa),
+# criado uma única vez por processo e compartilhado entre as sessões
+@st.cache_resource
+def obter_motor():
+    return MotorBriefing.do_ambiente()
+
+motor = obter_motor()
+
+# Exportador de briefings (ZIP, DOCX e PDF), com pool de processos compartilhado;
+# importado só quando um lote for exportado
+@st.cache_resource
+def obter_exportador():
+    from briefing.exportacao import ExportadorBriefings
+
+    return ExportadorBriefings.do_ambiente()
+
+# Endpoint /metrics no formato do Prometheus em uma porta própria
+# (BRIEFING_METRICAS_PORTA), iniciado uma única vez por processo
+@st.cache_resource
+def iniciar_servidor_metricas():
+    porta = os.getenv("BRIEFING_METRICAS_PORTA")
+    if not porta:
+        return None
+    return servir_metricas(int(porta), os.getenv("BRIEFING_METRICAS_HOST", "0.0.0.0"))
+
+iniciar_servidor_metricas()
 
 # Título da aplicação
 st.title("📋 Gerador de Briefing para Desenvolvimento de Site")
@@ -26,199 +51,359 @@ st.markdown("""
 Preencha o formulário abaixo ou faça upload de um arquivo CSV com as respostas para gerar automaticamente um briefing completo.
 """)
 
-# Função para mapear colunas do CSV para o formato interno
-def mapear_csv_para_respostas(df):
-    # Pega a primeira linha (assumindo que há apenas um registro no CSV)
-    row = df.iloc[0]
-    
-    respostas = {
-        "nome_empresa": row.get("Nome da sua empresa/Instituição", ""),
-        "nome_responsavel": row.get("Nome:", ""),
-        "cargo_responsavel": row.get("Cargo:", ""),
-        "email_responsavel": row.get("E-mail:", ""),
-        "telefone_responsavel": row.get("Telefone:", ""),
-        "descricao_site": row.get("Por favor, descreva o site que deseja.", ""),
-        "objetivos_principais": row.get("Quais são os principais objetivos que você deseja alcançar com o site?", ""),
-        "objetivos_secundarios": row.get("Há objetivos secundários que o site deve atingir?", ""),
-        "publico_alvo": row.get("Quem é o público-alvo do seu site?", ""),
-        "segmentos_especificos": row.get("Há algum segmento específico que precisa ser destacado no site?", ""),
-        "concorrentes": row.get("Quem são os seus principais concorrentes?", ""),
-        "gosta_concorrentes": row.get("O que você gosta nos sites dos seus concorrentes?", ""),
-        "nao_gosta_concorrentes": row.get("O que você não gosta nos sites dos seus concorrentes?", ""),
-        "diferenciais": row.get("O que você espera que seu site ofereça de diferente em relação aos concorrentes?", ""),
-        "funcionalidades": row.get("Quais funcionalidades específicas você gostaria de incluir no site?", ""),
-        "conteudo_pronto": "Sim" if str(row.get("Você já possui todo o conteúdo pronto (textos, imagens, vídeos)?", "")).lower().startswith(('sim', 's', 'yes', 'y')) else "Não",
-        "numero_paginas": row.get("Quantas páginas aproximadamente o site terá?", ""),
-        "paginas_desejadas": row.get("Quais páginas você gostaria de incluir no novo site?", ""),
-        "percepcao_visual": row.get("Como você gostaria que o site fosse visualmente percebido?", ""),
-        "referencias_gosta": row.get("Há algum site ou referência visual que você gosta?", ""),
-        "referencias_nao_gosta": row.get("Há alguma referência visual que você não gosta?", ""),
-        "seo": "Sim" if str(row.get("O site precisa ser otimizado para SEO?", "")).lower().startswith(('sim', 's', 'yes', 'y')) else "Não",
-        "otimizacoes_seo": row.get("Se sim, gostaria de incluir algum tipo de otimização específica?", ""),
-        "mobile_prioritario": "Sim" if str(row.get("A versão mobile do site é uma prioridade?", "")).lower().startswith(('sim', 's', 'yes', 'y')) else "Não",
-        "ssl": "Sim" if str(row.get("Você precisa de algum certificado de segurança SSL para o site?", "")).lower().startswith(('sim', 's', 'yes', 'y')) else "Não",
-        "plataforma": row.get("Você tem alguma preferência de plataforma para o desenvolvimento do site?", ""),
-        "hospedagem": "Sim" if str(row.get("Você já possui um serviço de hospedagem para o site?", "")).lower().startswith(('sim', 's', 'yes', 'y')) else "Não",
-        "uso_dados": "Sim" if str(row.get("Você deseja utilizar dados de usuários no seu site (exemplo: cookies, analytics)?", "")).lower().startswith(('sim', 's', 'yes', 'y')) else "Não",
-        "banner_cookies": "Sim" if str(row.get("Será necessário implementar alguma solução de governança digital, como banner de consentimento para cookies?", "")).lower().startswith(('sim', 's', 'yes', 'y')) else "Não",
-        "tagueamento": "Sim" if str(row.get("Você precisará de tagueamento de dados para monitoramento de ações no site?", "")).lower().startswith(('sim', 's', 'yes', 'y')) else "Não",
-        "tags_especificas": row.get("Quais tags de conversão ou tracking você precisará integrar?", ""),
-        "integracoes": "Sim" if str(row.get("Você irá integrar o site com plataformas externas ou APIs?", "")).lower().startswith(('sim', 's', 'yes', 'y')) else "Não",
-        "detalhes_integracoes": row.get("Quais integrações específicas?", ""),
-        "prazo": row.get("Qual a sua expectativa de prazo para o lançamento do novo site?", ""),
-        "tem_orcamento": "Sim" if str(row.get("Você já tem um orçamento estimado para esse projeto?", "")).lower().startswith(('sim', 's', 'yes', 'y')) else "Não",
-        "orcamento": row.get("Orçamento estimado", ""),
-        "manutencao": "Sim" if str(row.get("Após o lançamento, você precisará de serviços de manutenção contínuos?", "")).lower().startswith(('sim', 's', 'yes', 'y')) else "Não",
-        "consideracoes_finais": f"{row.get('Há alguma outra necessidade ou exigência que não foi mencionada?', '')}\n\n{row.get('Alguma consideração adicional sobre o projeto que gostaria de compartilhar conosco?', '')}"
-    }
-    
-    return respostas
+# Área onde aparece o briefing aberto a partir do histórico (barra lateral)
+area_historico = st.container()
 
 # Função para gerar o briefing com a LLM
-def gerar_briefing(respostas):
-    prompt = f"""
-    Com base nas seguintes respostas do cliente, gere um briefing profissional e detalhado 
-    para desenvolvimento de um site institucional/empresarial. Organize em seções claras 
-    com títulos destacados e mantenha um tom profissional:
-
-    # Briefing para Desenvolvimento de Site - {respostas['nome_empresa']}
-
-    ## 1. Informações Básicas
-    - Empresa: {respostas['nome_empresa']}
-    - Responsável: {respostas['nome_responsavel']} ({respostas['cargo_responsavel']})
-    - Contato: {respostas['email_responsavel']} | {respostas['telefone_responsavel']}
-
-    ## 2. Descrição do Projeto
-    O cliente deseja: {respostas['descricao_site']}
-
-    ## 3. Objetivos
-    Principais objetivos:
-    - {respostas['objetivos_principais']}
-
-    Objetivos secundários:
-    - {respostas['objetivos_secundarios'] if respostas['objetivos_secundarios'] else 'Não especificado'}
-
-    ## 4. Público-Alvo
-    {respostas['publico_alvo']}
-
-    Segmentos específicos:
-    - {respostas['segmentos_especificos'] if respostas['segmentos_especificos'] else 'Não aplicável'}
-
-    ## 5. Análise Competitiva
-    Concorrentes mencionados: {respostas['concorrentes']}
-
-    Pontos positivos observados nos concorrentes:
-    - {respostas['gosta_concorrentes']}
-
-    Pontos negativos observados nos concorrentes:
-    - {respostas['nao_gosta_concorrentes']}
-
-    Diferenciais desejados:
-    - {respostas['diferenciais']}
-
-    ## 6. Requisitos Técnicos e Funcionalidades
-    Funcionalidades solicitadas:
-    - {respostas['funcionalidades']}
-
-    Conteúdo disponível:
-    - {'Sim, o cliente já possui todo o conteúdo' if respostas['conteudo_pronto'] == 'Sim' else 'Não, será necessário criar conteúdo'}
-
-    Número estimado de páginas: {respostas['numero_paginas']}
-
-    Páginas solicitadas:
-    - {respostas['paginas_desejadas']}
-
-    ## 7. Design e Identidade Visual
-    Percepção visual desejada: {respostas['percepcao_visual']}
-
-    Referências de design:
-    - O que gosta: {respostas['referencias_gosta']}
-    - O que não gosta: {respostas['referencias_nao_gosta']}
-
-    ## 8. SEO e Performance
-    Necessidade de SEO: {'Sim' if respostas['seo'] == 'Sim' else 'Não'}
-    {'Otimizações específicas solicitadas: ' + respostas['otimizacoes_seo'] if respostas['seo'] == 'Sim' else ''}
-
-    Prioridade mobile: {'Alta' if respostas['mobile_prioritario'] == 'Sim' else 'Não especificada'}
-    Certificado SSL: {'Necessário' if respostas['ssl'] == 'Sim' else 'Não solicitado'}
-
-    ## 9. Plataforma e Hospedagem
-    Plataforma preferida: {respostas['plataforma'] if respostas['plataforma'] else 'Não especificada'}
-    Hospedagem: {'Já possui' if respostas['hospedagem'] == 'Sim' else 'Necessária'}
-
-    ## 10. Governança Digital
-    Uso de dados: {'Sim' if respostas['uso_dados'] == 'Sim' else 'Não'}
-    Banner de consentimento: {'Necessário' if respostas['banner_cookies'] == 'Sim' else 'Não necessário'}
-    Tagueamento: {'Sim' if respostas['tagueamento'] == 'Sim' else 'Não'}
-    {'Tags específicas: ' + respostas['tags_especificas'] if respostas['tagueamento'] == 'Sim' else ''}
-
-    ## 11. Integrações
-    Integrações necessárias: {'Sim' if respostas['integracoes'] == 'Sim' else 'Não'}
-    {'Detalhes das integrações: ' + respostas['detalhes_integracoes'] if respostas['integracoes'] == 'Sim' else ''}
-
-    ## 12. Cronograma e Orçamento
-    Prazo desejado: {respostas['prazo']}
-    {'Orçamento estimado: ' + respostas['orcamento'] if respostas['tem_orcamento'] == 'Sim' else 'Orçamento não informado'}
-    Manutenção pós-lançamento: {'Necessária' if respostas['manutencao'] == 'Sim' else 'Não solicitada'}
-
-    ## 13. Considerações Adicionais
-    {respostas['consideracoes_finais'] if respostas['consideracoes_finais'] else 'Nenhuma consideração adicional'}
-
-    ---
+def gerar_briefing(respostas, usar_cache=True, por_secoes=False, anterior=None):
+    try:
+        return motor.gerar(respostas, usar_cache, por_secoes, anterior)
+    except Exception as e:
+        st.error(f"Erro ao gerar o briefing: {str(e)}")
+        return None
 
-    Por favor, formate este briefing em um documento profissional com:
-    1. Seções claramente destacadas
-    2. Listas com marcadores para facilitar a leitura
-    3. Destaque para informações críticas
-    4. Linguagem técnica apropriada para desenvolvimento web
-    5. Resumo executivo no início destacando os pontos mais importantes
-    """
-    
+# Função para gerar o briefing exibindo o texto à medida que chega do modelo
+def transmitir_briefing(respostas, usar_cache=True):
+    transmissao = motor.transmitir(respostas, usar_cache)
+    if not transmissao.do_cache:
+        st.caption(f"Enviando prompt com ~{transmissao.tokens_prompt_estimados} tokens")
     try:
-        response = model.generate_content(prompt)
-        return response.text
+        st.write_stream(transmissao.trechos())
     except Exception as e:
         st.error(f"Erro ao gerar o briefing: {str(e)}")
         return None
+    return transmissao.resultado()
+
+# Mostra se o briefing veio do cache ou do modelo, quanto tempo levou e os tokens usados
+def exibir_origem(resultado, duracao):
+    if resultado["do_cache"]:
+        st.caption(f"⚡ Recuperado do cache em {duracao * 1000:.0f} ms")
+        return
+
+    detalhes = f"🤖 Gerado pelo modelo {motor.modelo} em {duracao:.1f} s"
+    if resultado["tempo_primeiro_trecho"] is not None:
+        detalhes += f" (primeiro trecho em {resultado['tempo_primeiro_trecho']:.1f} s)"
+    detalhes += f" · tokens: ~{resultado['tokens_prompt_estimados']} estimados no prompt"
+    if resultado["tokens_entrada"] or resultado["tokens_saida"]:
+        detalhes += f", {resultado['tokens_entrada']} de entrada e {resultado['tokens_saida']} de saída"
+    if resultado.get("secoes_reaproveitadas"):
+        detalhes += f" · {len(resultado['secoes_reaproveitadas'])} seções reaproveitadas da versão anterior"
+    st.caption(detalhes)
+
+# Botão para baixar o briefing em Markdown
+def botao_download(respostas, briefing, key=None):
+    st.download_button(
+        label="Baixar Briefing",
+        data=briefing,
+        file_name=f"briefing_site_{respostas['nome_empresa']}_{datetime.now().strftime('%Y%m%d')}.md",
+        mime="text/markdown",
+        key=key
+    )
+
+# Exibe o texto do briefing (se ainda não estiver na tela) e o botão de download,
+# registrando o tempo nas métricas (etapa "renderizacao")
+def exibir_texto_briefing(respostas, briefing, key=None, exibir_texto=True):
+    with METRICAS.medir("renderizacao"):
+        if exibir_texto:
+            st.markdown(briefing)
+        botao_download(respostas, briefing, key)
+
+# Gera e exibe o briefing (em tempo real ou de uma vez), com o botão de download
+# disponível somente depois que o texto estiver completo. Retorna o resultado
+# para ser guardado na sessão, ou None em caso de erro. `anterior` é um
+# resultado desta sessão usado para regerar só as seções alteradas.
+def exibir_briefing(respostas, mensagem_espera, mensagem_sucesso, usar_cache=True, key=None, anterior=None):
+    inicio = time.perf_counter()
+    # A geração por seções junta várias respostas independentes e não é transmitida
+    transmitido = modo_streaming and not por_secoes
+    if transmitido:
+        st.subheader("📄 Briefing Completo para Desenvolvimento de Site")
+        resultado = transmitir_briefing(respostas, usar_cache)
+        if resultado:
+            st.success(mensagem_sucesso)
+            exibir_origem(resultado, time.perf_counter() - inicio)
+    else:
+        with st.spinner(mensagem_espera):
+            resultado = gerar_briefing(respostas, usar_cache, por_secoes, anterior)
+        if resultado:
+            st.success(mensagem_sucesso)
+            exibir_origem(resultado, time.perf_counter() - inicio)
+            st.subheader("📄 Briefing Completo para Desenvolvimento de Site")
+
+    if not resultado:
+        return None
+
+    # O texto transmitido já está na tela
+    exibir_texto_briefing(respostas, resultado["briefing"], key, exibir_texto=not transmitido)
+    resultado["respostas"] = respostas
+    resultado["duracao"] = time.perf_counter() - inicio
+    return resultado
+
+# Exibe novamente um briefing já gerado nesta sessão, sem chamar o modelo
+def exibir_briefing_salvo(resultado, key=None):
+    st.subheader("📄 Briefing Completo para Desenvolvimento de Site")
+    st.caption("💾 Briefing já gerado nesta sessão")
+    exibir_origem(resultado, resultado["duracao"])
+    exibir_texto_briefing(resultado["respostas"], resultado["briefing"], key)
+
+# Exibe o briefing guardado na sessão sob `chave` ou gera um novo. O modelo só é
+# chamado novamente quando não há resultado salvo ou o usuário pede para regerar.
+# No modo por seções, respostas editadas reaproveitam as seções do último
+# briefing gerado na sessão que não dependem dos campos alterados.
+def exibir_briefing_da_sessao(estado, chave, respostas, mensagem_espera, mensagem_sucesso, key):
+    briefings = st.session_state.setdefault(estado, {})
+    regerar = chave in briefings and st.button("🔄 Regerar briefing", key=f"regerar_{key}")
+    if chave in briefings and not regerar:
+        exibir_briefing_salvo(briefings[chave], key=f"download_{key}")
+        return
+
+    anterior = None
+    if por_secoes and not regerar:
+        anterior = next((r for r in reversed(briefings.values()) if r.get("secoes")), None)
+    resultado = exibir_briefing(
+        respostas, mensagem_espera, mensagem_sucesso, usar_cache=not regerar, key=f"download_{key}", anterior=anterior
+    )
+    if resultado:
+        # Mantém a ordem de inserção como ordem de geração
+        briefings.pop(chave, None)
+        briefings[chave] = resultado
+
+# Remove o ZIP exportado de um lote (ex.: quando o lote é gerado novamente)
+def descartar_exportacao(hash_arquivo):
+    exportacao = st.session_state.setdefault("exportacoes_lote", {}).pop(hash_arquivo, None)
+    if exportacao:
+        # O ZIP pode já ter sido removido pela limpeza do exportador
+        try:
+            os.remove(exportacao["caminho"])
+        except FileNotFoundError:
+            pass
+
+# Exporta todos os briefings do lote em um único ZIP, nos formatos escolhidos. O
+# ZIP é montado à medida que cada documento fica pronto, no diretório do
+# exportador, que remove os ZIPs mais antigos junto com os artefatos.
+def exibir_exportacao_lote(hash_arquivo, resultado_lote):
+    itens = [(respostas["nome_empresa"], resultado["briefing"]) for respostas, resultado in resultado_lote if resultado["briefing"]]
+    if not itens:
+        return
+    st.subheader("📦 Exportar lote")
+    formatos = st.multiselect(
+        "Formatos", ["md", "docx", "pdf"], default=["md"], format_func=str.upper, key=f"formatos_{hash_arquivo}"
+    )
+    exportacoes = st.session_state.setdefault("exportacoes_lote", {})
+    if st.button("Preparar arquivo ZIP", disabled=not formatos, key=f"exportar_{hash_arquivo}"):
+        descartar_exportacao(hash_arquivo)
+        barra_exportacao = st.progress(0.0, text="Preparando arquivo ZIP...")
+
+        def atualizar_exportacao(concluidos, total):
+            barra_exportacao.progress(concluidos / total, text=f"{concluidos} de {total} arquivos prontos")
+
+        destino = obter_exportador().novo_zip()
+        try:
+            with destino, METRICAS.medir("exportacao"):
+                obter_exportador().exportar_zip(itens, formatos, destino, atualizar_exportacao)
+            exportacoes[hash_arquivo] = {"caminho": destino.name, "formatos": formatos}
+        except Exception as e:
+            os.remove(destino.name)
+            st.error(f"Erro ao exportar os briefings: {str(e)}")
+
+    exportacao = exportacoes.get(hash_arquivo)
+    if exportacao and obter_exportador().reaproveitar(exportacao["caminho"]):
+        with open(exportacao["caminho"], "rb") as arquivo_zip:
+            st.download_button(
+                label=f"Baixar ZIP ({', '.join(formato.upper() for formato in exportacao['formatos'])})",
+                data=arquivo_zip,
+                file_name=f"briefings_{datetime.now().strftime('%Y%m%d')}.zip",
+                mime="application/zip",
+                key=f"download_zip_{hash_arquivo}"
+            )
+
+# Exibição em tempo real do texto gerado (reduz o tempo até o primeiro conteúdo)
+modo_streaming = st.sidebar.toggle(
+    "Exibir briefing em tempo real",
+    value=True,
+    help="Mostra o briefing à medida que o modelo gera o texto, em vez de aguardar o documento completo"
+)
+
+# Geração por seções: dados fixos renderizados localmente e só as seções em prosa
+# enviadas à LLM, em chamadas paralelas
+por_secoes = st.sidebar.radio(
+    "Modo de geração",
+    ("Documento único", "Por seções (paralelo)"),
+    help="No modo por seções, apenas resumo executivo, objetivos, análise competitiva e design são "
+         "redigidos pelo modelo, em paralelo; as demais seções são montadas a partir das respostas. "
+         "Ao reenviar o formulário com alterações, só as seções afetadas voltam ao modelo"
+) == "Por seções (paralelo)"
 
 # Opção de upload de CSV
 st.sidebar.header("Opção de Upload")
 uploaded_file = st.sidebar.file_uploader("Faça upload de um arquivo CSV com as respostas", type=["csv"])
 
-if uploaded_file is not None:
+# Lê o cabeçalho e o primeiro bloco do CSV uma vez por arquivo e motor de
+# leitura; os reruns seguintes reaproveitam a análise guardada na sessão
+def analisar_csv(uploaded_file, motor_csv):
+    from briefing.leitura_csv import ler_csv_em_blocos, preparar_leitura
+    from briefing.mapeamento import mapear_csv_para_respostas
+
+    chave = (uploaded_file.file_id, motor_csv)
+    analise = st.session_state.get("analise_csv")
+    if analise is not None and analise["chave"] == chave:
+        return analise
+
+    # Lê o cabeçalho e associa as colunas às perguntas do formulário; só as
+    # colunas usadas pelo mapeamento são lidas do CSV
+    mapeamento = preparar_leitura(uploaded_file)
+
+    # A pré-visualização usa apenas o primeiro bloco, sem ler o resto do arquivo
+    blocos = ler_csv_em_blocos(uploaded_file, mapeamento.colunas_usadas, motor_csv)
+    primeiro_bloco = next(blocos, None)
+    # Há mais de uma resposta se o primeiro bloco já tiver várias linhas ou
+    # se existir um segundo bloco
+    linhas_primeiro_bloco = 0 if primeiro_bloco is None else len(primeiro_bloco)
+    varias_respostas = linhas_primeiro_bloco > 1 or (
+        linhas_primeiro_bloco == 1 and next(blocos, None) is not None
+    )
+    blocos.close()
+
+    analise = {
+        "chave": chave,
+        # Identifica o upload pelo conteúdo para não gerar de novo a cada rerun
+        "hash_arquivo": hashlib.sha256(uploaded_file.getvalue()).hexdigest(),
+        "mapeamento": mapeamento,
+        "previa": None if primeiro_bloco is None else primeiro_bloco.head(),
+        "vazio": linhas_primeiro_bloco == 0,
+        "varias_respostas": varias_respostas,
+        "primeira_resposta": None if linhas_primeiro_bloco == 0 else mapear_csv_para_respostas(primeiro_bloco, mapeamento)[0],
+    }
+    st.session_state["analise_csv"] = analise
+    return analise
+
+# Briefings gerados a partir do CSV. Isolado em um fragmento: gerar, regerar,
+# exportar ou baixar não executa de novo a barra lateral nem o formulário.
+@st.fragment
+def area_csv(uploaded_file, analise, motor_csv, max_simultaneas):
+    import pandas as pd
+    from briefing.leitura_csv import iterar_respostas
+
+    hash_arquivo = analise["hash_arquivo"]
+    mapeamento = analise["mapeamento"]
     try:
-        # Lê o arquivo CSV
-        df = pd.read_csv(uploaded_file)
-        
-        # Mostra pré-visualização
-        st.sidebar.subheader("Pré-visualização do CSV")
-        st.sidebar.write(df.head())
-        
-        # Mapeia para o formato interno
-        respostas = mapear_csv_para_respostas(df)
-        
-        # Gera o briefing
-        with st.spinner("Gerando briefing a partir do CSV..."):
-            briefing = gerar_briefing(respostas)
-            
-            if briefing:
-                st.success("Briefing gerado com sucesso a partir do CSV!")
-                st.subheader("📄 Briefing Completo para Desenvolvimento de Site")
-                st.markdown(briefing)
-                
-                # Opção para download
-                st.download_button(
-                    label="Baixar Briefing",
-                    data=briefing,
-                    file_name=f"briefing_site_{respostas['nome_empresa']}_{datetime.now().strftime('%Y%m%d')}.md",
-                    mime="text/markdown"
+        if analise["vazio"]:
+            st.warning("O CSV não contém respostas.")
+        elif analise["varias_respostas"]:
+            # Modo em lote: um briefing por linha do CSV
+            st.subheader("📚 Geração em lote (várias respostas no CSV)")
+            lotes = st.session_state.setdefault("resultados_lote", {})
+            rotulo_botao = "🔄 Regerar briefings em lote" if hash_arquivo in lotes else "Gerar briefings em lote"
+            if st.button(rotulo_botao):
+                with st.spinner("Lendo respostas do CSV..."):
+                    lista_respostas = list(iterar_respostas(uploaded_file, mapeamento, motor_csv))
+                total = len(lista_respostas)
+                status_linhas = ["⏳ Aguardando"] * total
+                barra_progresso = st.progress(0.0, text=f"0 de {total} briefings gerados")
+                tabela_status = st.empty()
+
+                def atualizar_progresso(indice, resultado):
+                    if resultado["erro"] is not None:
+                        status_linhas[indice] = f"❌ {resultado['erro']}"
+                    else:
+                        status_linhas[indice] = "⚡ Cache" if resultado["do_cache"] else "✅ Gerado"
+                    concluidos = sum(1 for status in status_linhas if status != "⏳ Aguardando")
+                    barra_progresso.progress(concluidos / total, text=f"{concluidos} de {total} briefings gerados")
+                    tabela_status.dataframe(pd.DataFrame({
+                        "Empresa": [respostas["nome_empresa"] for respostas in lista_respostas],
+                        "Status": status_linhas
+                    }))
+
+                # Regerar ignora o cache para obter uma nova versão de cada briefing
+                resultados = motor.gerar_em_lote(
+                    lista_respostas, max_simultaneas, atualizar_progresso,
+                    usar_cache=hash_arquivo not in lotes, por_secoes=por_secoes
                 )
+                # Guarda o resultado na sessão para sobreviver aos reruns (ex.: cliques em download)
+                lotes[hash_arquivo] = list(zip(lista_respostas, resultados))
+                descartar_exportacao(hash_arquivo)
+
+            if hash_arquivo in lotes:
+                resultado_lote = lotes[hash_arquivo]
+                falhas = [(indice, respostas, resultado) for indice, (respostas, resultado) in enumerate(resultado_lote) if resultado["erro"] is not None]
+                total_cache = sum(1 for _, resultado in resultado_lote if resultado["do_cache"])
+                st.success(f"{len(resultado_lote) - len(falhas)} de {len(resultado_lote)} briefings gerados com sucesso ({total_cache} recuperados do cache).")
+                tokens_entrada = sum(resultado.get("tokens_entrada", 0) for _, resultado in resultado_lote)
+                tokens_saida = sum(resultado.get("tokens_saida", 0) for _, resultado in resultado_lote)
+                st.caption(f"Tokens consumidos no lote: {tokens_entrada} de entrada e {tokens_saida} de saída")
+                if falhas:
+                    st.error(f"{len(falhas)} linha(s) falharam:")
+                    for indice, respostas, resultado in falhas:
+                        st.write(f"- Linha {indice + 1} ({respostas['nome_empresa']}): {resultado['erro']}")
+
+                exibir_exportacao_lote(hash_arquivo, resultado_lote)
+
+                for indice, (respostas, resultado) in enumerate(resultado_lote):
+                    if resultado["briefing"]:
+                        origem = "⚡ " if resultado["do_cache"] else ""
+                        with st.expander(f"📄 {origem}Linha {indice + 1} - {respostas['nome_empresa']}"):
+                            exibir_texto_briefing(respostas, resultado["briefing"], key=f"download_lote_{indice}")
+        else:
+            # Gera o briefing uma única vez por arquivo enviado
+            exibir_briefing_da_sessao(
+                "briefings_csv", f"{hash_arquivo}/{por_secoes}", analise["primeira_resposta"],
+                "Gerando briefing a partir do CSV...", "Briefing gerado com sucesso a partir do CSV!",
+                key="csv"
+            )
     except Exception as e:
         st.error(f"Erro ao processar o arquivo CSV: {str(e)}")
 
-# Formulário manual
-st.header("Ou preencha o formulário manualmente")
-with st.form("formulario_briefing"):
+if uploaded_file is not None:
+    motor_csv = "pyarrow" if st.sidebar.checkbox(
+        "Ler CSV com pyarrow",
+        value=os.getenv("BRIEFING_CSV_MOTOR", "c") == "pyarrow",
+        help="Usa o leitor em blocos do pyarrow, mais rápido para exportações grandes"
+    ) else "c"
+
+    try:
+        analise = analisar_csv(uploaded_file, motor_csv)
+    except Exception as e:
+        analise = None
+        st.error(f"Erro ao processar o arquivo CSV: {str(e)}")
+
+    if analise is not None:
+        mapeamento = analise["mapeamento"]
+        if analise["previa"] is not None:
+            st.sidebar.subheader("Pré-visualização do CSV")
+            st.sidebar.write(analise["previa"])
+        if mapeamento.perguntas_sem_coluna or mapeamento.colunas_nao_mapeadas or mapeamento.por_similaridade:
+            with st.sidebar.expander("Mapeamento de colunas"):
+                if mapeamento.por_similaridade:
+                    st.write("Colunas associadas por similaridade:")
+                    for pergunta, coluna in mapeamento.por_similaridade.items():
+                        st.write(f"- {coluna} → {pergunta}")
+                if mapeamento.perguntas_sem_coluna:
+                    st.warning("Perguntas não encontradas no CSV (serão tratadas como vazias):\n\n"
+                               + "\n".join(f"- {pergunta}" for pergunta in mapeamento.perguntas_sem_coluna))
+                if mapeamento.colunas_nao_mapeadas:
+                    st.info("Colunas do CSV ignoradas:\n\n"
+                            + "\n".join(f"- {coluna}" for coluna in mapeamento.colunas_nao_mapeadas))
+
+        max_simultaneas = None
+        if analise["varias_respostas"]:
+            max_simultaneas = st.sidebar.number_input(
+                "Gerações simultâneas",
+                min_value=1,
+                # Acima do limite do processo (BRIEFING_LIMITE_SIMULTANEAS) as
+                # gerações extras só esperariam no limitador de taxa
+                max_value=motor.limitador.max_simultaneas,
+                value=min(int(os.getenv("BRIEFING_MAX_SIMULTANEAS", "4")), motor.limitador.max_simultaneas),
+                help="Número máximo de briefings gerados ao mesmo tempo no modo em lote. As chamadas à LLM "
+                     f"de todas as sessões são limitadas a {motor.limitador.max_simultaneas} simultâneas "
+                     "(BRIEFING_LIMITE_SIMULTANEAS)"
+            )
+        area_csv(uploaded_file, analise, motor_csv, max_simultaneas)
+
+# Formulário manual, isolado em um fragmento: editar um campo executa de novo só
+# o formulário, e os campos condicionais (otimizações de SEO, tags, detalhes das
+# integrações, orçamento) aparecem assim que a opção correspondente é marcada
+@st.fragment
+def formulario_briefing():
     st.subheader("Informações Básicas")
     col1, col2 = st.columns(2)
     with col1:
@@ -360,7 +545,7 @@ with st.form("formulario_briefing"):
                                       key="consideracoes_finais")
 
     # Botão de submissão
-    submitted = st.form_submit_button("Gerar Briefing Completo")
+    submitted = st.button("Gerar Briefing Completo", type="primary")
     if submitted:
         # Validar campos obrigatórios
         campos_obrigatorios = {
@@ -427,19 +612,146 @@ with st.form("formulario_briefing"):
                 "consideracoes_finais": consideracoes_finais
             }
 
-            # Gerar o briefing
-            with st.spinner("Gerando briefing profissional..."):
-                briefing = gerar_briefing(respostas)
-                
-                if briefing:
-                    st.success("Briefing gerado com sucesso!")
-                    st.subheader("📄 Briefing Completo para Desenvolvimento de Site")
-                    st.markdown(briefing)
-                    
-                    # Opção para download
-                    st.download_button(
-                        label="Baixar Briefing",
-                        data=briefing,
-                        file_name=f"briefing_site_{nome_empresa}_{datetime.now().strftime('%Y%m%d')}.md",
-                        mime="text/markdown"
-                    )
+            # Guarda as respostas na sessão e executa a página de novo para que o
+            # resultado, exibido fora do formulário, seja gerado
+            st.session_state["respostas_formulario"] = respostas
+            st.rerun()
+
+# Resultado do formulário manual, em seu próprio fragmento: regerar ou baixar não
+# executa de novo o formulário. Reenviar as mesmas respostas reaproveita o
+# briefing salvo na sessão.
+@st.fragment
+def resultado_formulario():
+    if "respostas_formulario" not in st.session_state:
+        return
+    respostas_formulario = st.session_state["respostas_formulario"]
+    exibir_briefing_da_sessao(
+        "briefings_formulario", motor.chave(respostas_formulario, por_secoes), respostas_formulario,
+        "Gerando briefing profissional...", "Briefing gerado com sucesso!",
+        key="formulario"
+    )
+
+st.header("Ou preencha o formulário manualmente")
+formulario_briefing()
+resultado_formulario()
+
+# Histórico de briefings gerados: busca por empresa/conteúdo e listagem paginada
+# por cursor, sem carregar o histórico inteiro
+def selecionar_historico(id_briefing):
+    st.session_state["briefing_historico"] = id_briefing
+
+def navegar_historico(cursor):
+    paginas = st.session_state["historico_paginas"]
+    if cursor is None:
+        paginas.pop()
+    else:
+        paginas.append(cursor)
+
+# Painel da barra lateral em um fragmento: buscar e paginar não executa de novo o
+# resto da página; abrir um briefing executa a página inteira para exibi-lo
+@st.fragment
+def painel_historico():
+    st.header("Histórico")
+    termo = st.text_input("Buscar no histórico", placeholder="Empresa ou trecho do briefing").strip()
+    # A paginação recomeça quando o termo de busca muda
+    if st.session_state.get("historico_termo") != termo:
+        st.session_state["historico_termo"] = termo
+        st.session_state["historico_paginas"] = [None]
+    paginas = st.session_state["historico_paginas"]
+    # Um item a mais indica se existe uma próxima página
+    if termo:
+        itens = motor.historico.buscar(termo, paginas[-1], TAMANHO_PAGINA + 1)
+    else:
+        itens = motor.historico.listar(paginas[-1], TAMANHO_PAGINA + 1)
+    if not itens:
+        st.caption("Nenhum briefing encontrado" if termo else "Nenhum briefing gerado ainda")
+    for item in itens[:TAMANHO_PAGINA]:
+        data = datetime.fromtimestamp(item["criado_em"]).strftime("%d/%m/%Y %H:%M")
+        if st.button(f"{item['nome_empresa'] or 'Sem nome'} · {data}", key=f"historico_{item['id']}",
+                     use_container_width=True):
+            selecionar_historico(item["id"])
+            st.rerun()
+        if termo:
+            st.caption(item["trecho"])
+    coluna_recentes, coluna_antigos = st.columns(2)
+    if len(paginas) > 1:
+        coluna_recentes.button("← Mais recentes", on_click=navegar_historico, args=(None,))
+    if len(itens) > TAMANHO_PAGINA:
+        coluna_antigos.button(
+            "Mais antigos →", on_click=navegar_historico, args=(cursor_pagina(itens[:TAMANHO_PAGINA]),)
+        )
+
+# Briefing aberto a partir do histórico, no topo da página
+@st.fragment
+def briefing_do_historico():
+    id_briefing = st.session_state.get("briefing_historico")
+    if id_briefing is None:
+        return
+    registro = motor.historico.obter(id_briefing)
+    if registro is None:
+        st.warning("Briefing não encontrado no histórico")
+        return
+    st.subheader(f"🗂️ Briefing do histórico: {registro['nome_empresa']}")
+    st.caption(
+        f"Gerado em {datetime.fromtimestamp(registro['criado_em']).strftime('%d/%m/%Y %H:%M')} "
+        f"pelo modelo {registro['modelo']} · tokens: {registro['tokens_entrada']} de entrada e "
+        f"{registro['tokens_saida']} de saída"
+    )
+    st.button("Fechar", key="fechar_historico", on_click=selecionar_historico, args=(None,))
+    exibir_texto_briefing(registro["respostas"], registro["briefing"], key="download_historico")
+    st.divider()
+
+if motor.historico is not None:
+    with st.sidebar:
+        painel_historico()
+    with area_historico:
+        briefing_do_historico()
+
+# Painel administrativo com as métricas do processo (BRIEFING_PAINEL_METRICAS=1):
+# duração por etapa, erros, tokens e custo estimado. Em um fragmento, atualizar
+# não executa de novo a página.
+@st.fragment
+def painel_metricas():
+    resumo = METRICAS.resumo()
+    st.button("🔄 Atualizar", key="atualizar_metricas")
+    contadores = {}
+    erros = []
+    for contador in resumo["contadores"]:
+        if contador["metrica"] == "briefing_erros_total":
+            erros.append({"Etapa": contador["etapa"], "Erro": contador["classe"], "Ocorrências": contador["valor"]})
+        else:
+            chave = (contador["metrica"], contador.get("tipo") or contador.get("resultado"))
+            contadores[chave] = contadores.get(chave, 0) + contador["valor"]
+
+    acertos = contadores.get(("briefing_cache_total", "acerto"), 0)
+    consultas = acertos + contadores.get(("briefing_cache_total", "falha"), 0)
+    coluna_entrada, coluna_saida, coluna_custo, coluna_cache = st.columns(4)
+    coluna_entrada.metric("Tokens de entrada", contadores.get(("briefing_tokens_total", "entrada"), 0))
+    coluna_saida.metric("Tokens de saída", contadores.get(("briefing_tokens_total", "saida"), 0))
+    coluna_custo.metric("Custo estimado", f"US$ {contadores.get(('briefing_custo_estimado_dolares_total', None), 0):.4f}")
+    coluna_cache.metric("Acertos no cache", f"{acertos / consultas:.0%}" if consultas else "-")
+
+    if not resumo["etapas"]:
+        st.caption("Nenhuma etapa medida ainda")
+        return
+    st.dataframe([
+        {
+            "Etapa": etapa["etapa"],
+            "Chamadas": etapa["chamadas"],
+            "Erros": etapa["erros"],
+            "Média (ms)": round(etapa["media_ms"], 1),
+            "p50 (ms)": round(etapa["p50_ms"], 1),
+            "p95 (ms)": round(etapa["p95_ms"], 1),
+        }
+        for etapa in resumo["etapas"]
+    ], hide_index=True, use_container_width=True)
+    if erros:
+        st.dataframe(erros, hide_index=True, use_container_width=True)
+    novas_tentativas = contadores.get(("briefing_novas_tentativas_total", None), 0)
+    if novas_tentativas:
+        st.caption(f"{novas_tentativas} chamada(s) repetida(s) após erro transitório")
+    st.caption("p50 e p95 aproximados pelos intervalos dos histogramas; valores deste processo desde o início")
+
+if os.getenv("BRIEFING_PAINEL_METRICAS") == "1":
+    with st.expander("📊 Métricas do servidor"):
+        painel_metricas()
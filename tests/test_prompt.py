@@ -0,0 +1,39 @@
+import random
+
+import pytest
+
+from briefing.prompt import CAMPOS_RESPOSTAS, estimar_tokens, montar_prompt, truncar
+
+
+def _respostas_aleatorias(aleatorio):
+    respostas = {}
+    for campo in CAMPOS_RESPOSTAS:
+        sorteio = aleatorio.random()
+        if sorteio < 0.3:
+            respostas[campo] = aleatorio.choice(("Sim", "Não"))
+        elif sorteio < 0.65:
+            respostas[campo] = "palavra " * aleatorio.randint(0, 8000)
+        else:
+            respostas[campo] = "x" * aleatorio.randint(0, 30000)
+    return respostas
+
+
+@pytest.mark.parametrize("max_tokens", [800, 1500, 3000, 6000])
+def test_prompt_respeita_orcamento_com_respostas_de_qualquer_tamanho(max_tokens):
+    aleatorio = random.Random(max_tokens)
+    for _ in range(50):
+        respostas = _respostas_aleatorias(aleatorio)
+        max_tokens_campo = aleatorio.choice((50, 400, 2000))
+        assert estimar_tokens(montar_prompt(respostas, max_tokens, max_tokens_campo)) <= max_tokens
+
+
+def test_respostas_curtas_longas_sao_limitadas():
+    respostas = {campo: "1 " * 20000 for campo in ("prazo", "orcamento", "numero_paginas", "telefone_responsavel")}
+    respostas["tem_orcamento"] = "Sim"
+    assert estimar_tokens(montar_prompt(respostas)) <= 3000
+
+
+@pytest.mark.parametrize("max_tokens", range(1, 20))
+def test_truncar_inclui_a_marca_de_corte_no_limite(max_tokens):
+    for texto in ("a" * 500, "ab " * 500):
+        assert estimar_tokens(truncar(texto, max_tokens)) <= max_tokens